@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+import sqlite3
+import zipfile
+import argparse
+import xml.etree.ElementTree as ET
+
+from generate_config import APPS, load_items, chord_of
+from resolve_shortcuts import read_cfg_items
+from verify_config import file_sha256
+
+DEFAULT_DB_PATH = "fleet_index.sqlite"
+
+# Bindings are stored once per archive content (sha256); files map users to content.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    user TEXT NOT NULL,
+    app TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archives (
+    sha256 TEXT PRIMARY KEY,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS bindings (
+    sha256 TEXT NOT NULL,
+    code TEXT NOT NULL,
+    shift INTEGER NOT NULL,
+    mod1 INTEGER NOT NULL,
+    mod2 INTEGER NOT NULL,
+    command TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bindings_chord ON bindings (code, shift, mod1, mod2);
+CREATE INDEX IF NOT EXISTS bindings_command ON bindings (command);
+CREATE INDEX IF NOT EXISTS bindings_sha256 ON bindings (sha256);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+CREATE INDEX IF NOT EXISTS files_app_user ON files (app, user);
+"""
+
+APP_KEYWORDS = {
+    "writer": ("writer", "word"),
+    "calc": ("calc", "excel"),
+    "impress": ("impress", "powerpoint"),
+}
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def guess_app(path):
+    name = os.path.basename(path)
+    for app_key, app in APPS.items():
+        if name == os.path.basename(app["output"]):
+            return app_key
+    lowered = name.lower()
+    for app_key, keywords in APP_KEYWORDS.items():
+        if any(k in lowered for k in keywords):
+            return app_key
+    return "unknown"
+
+def guess_user(path, root):
+    """Collected archives are expected under <root>/<user>/..."""
+    rel = os.path.relpath(path, root)
+    parts = rel.split(os.sep)
+    return parts[0] if len(parts) > 1 else "unknown"
+
+def index_archive(conn, sha256, path):
+    try:
+        items = read_cfg_items(path)
+        error = None
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, OSError) as e:
+        items = []
+        error = str(e) or e.__class__.__name__
+        print(f"Warning: Could not read {path}: {error}")
+
+    conn.execute("INSERT INTO archives (sha256, error) VALUES (?, ?)", (sha256, error))
+    conn.executemany(
+        "INSERT INTO bindings (sha256, code, shift, mod1, mod2, command) VALUES (?, ?, ?, ?, ?, ?)",
+        [(sha256, code, int(shift), int(mod1), int(mod2), command)
+         for code, shift, mod1, mod2, command in items if code and command]
+    )
+
+def ingest(conn, root):
+    """
+    Index every .cfg under root. Files whose mtime and size are unchanged are
+    skipped; changed files are hashed and only unseen contents are parsed.
+    Returns (scanned, updated, parsed, removed) counts.
+    """
+    known = {
+        path: (mtime_ns, size, sha256)
+        for path, mtime_ns, size, sha256 in conn.execute("SELECT path, mtime_ns, size, sha256 FROM files")
+    }
+    seen_archives = {row[0] for row in conn.execute("SELECT sha256 FROM archives")}
+
+    scanned = updated = parsed = 0
+    found = set()
+    released = set()  # contents a file stopped pointing to in this run
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(".cfg"):
+                continue
+            path = os.path.abspath(os.path.join(dirpath, filename))
+            found.add(path)
+            scanned += 1
+            st = os.stat(path)
+            previous = known.get(path)
+            if previous is not None and previous[:2] == (st.st_mtime_ns, st.st_size):
+                continue
+
+            sha256 = file_sha256(path)
+            if previous is not None and previous[2] != sha256:
+                released.add(previous[2])
+            if sha256 not in seen_archives:
+                index_archive(conn, sha256, path)
+                seen_archives.add(sha256)
+                parsed += 1
+            conn.execute(
+                "INSERT OR REPLACE INTO files (path, sha256, mtime_ns, size, user, app) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, sha256, st.st_mtime_ns, st.st_size, guess_user(path, root), guess_app(path))
+            )
+            updated += 1
+
+    # Files that disappeared from this root
+    root_prefix = os.path.join(os.path.abspath(root), "")
+    gone = [p for p in known if p.startswith(root_prefix) and p not in found]
+    conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in gone])
+    released.update(known[p][2] for p in gone)
+
+    # Released contents no file refers to any more
+    orphans = [(sha256,) for sha256 in released
+               if conn.execute("SELECT 1 FROM files WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone() is None]
+    conn.executemany("DELETE FROM bindings WHERE sha256 = ?", orphans)
+    conn.executemany("DELETE FROM archives WHERE sha256 = ?", orphans)
+    conn.commit()
+    return scanned, updated, parsed, len(gone)
+
+def query_chord(conn, shortcut, app=None, rebound=False):
+    """
+    Rows of (user, app, path, command) binding `shortcut`.
+    With rebound, only bindings that differ from the app's merged base mappings.
+    """
+    chord = chord_of(shortcut)
+    if chord is None:
+        raise ValueError(f"Could not parse key for {shortcut}")
+    code, shift, mod1, mod2 = chord
+
+    sql = ("SELECT f.user, f.app, f.path, b.command FROM bindings b JOIN files f ON f.sha256 = b.sha256 "
+           "WHERE b.code = ? AND b.shift = ? AND b.mod1 = ? AND b.mod2 = ?")
+    params = [code, int(shift), int(mod1), int(mod2)]
+    if app:
+        sql += " AND f.app = ?"
+        params.append(app)
+    rows = conn.execute(sql + " ORDER BY f.user, f.app, f.path", params).fetchall()
+
+    if rebound:
+        base = {}
+        for app_key in ([app] if app else APPS):
+            table = {item[:4]: item[4] for item in load_items(APPS[app_key]["mappings"], APPS[app_key]["defaults"])}
+            base[app_key] = table.get(chord)
+        rows = [r for r in rows if r[1] in base and r[3] != base[r[1]]]
+    return rows
+
+def query_command(conn, command, app=None):
+    sql = ("SELECT f.user, f.app, f.path, b.code, b.shift, b.mod1, b.mod2 FROM bindings b "
+           "JOIN files f ON f.sha256 = b.sha256 WHERE b.command = ?")
+    params = [command]
+    if app:
+        sql += " AND f.app = ?"
+        params.append(app)
+    return conn.execute(sql + " ORDER BY f.user, f.app, f.path", params).fetchall()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index collected .cfg archives and query shortcuts across the fleet")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help=f"SQLite database (default: {DEFAULT_DB_PATH})")
+    parser.add_argument("--ingest", metavar="DIR", action="append", help="Index archives under DIR (<DIR>/<user>/*.cfg)")
+    parser.add_argument("--chord", help="List users binding this shortcut, e.g. Ctrl+Space")
+    parser.add_argument("--command", help="List users binding this UNO command")
+    parser.add_argument("--app", choices=list(APPS), help="Restrict queries to one application")
+    parser.add_argument("--rebound", action="store_true", help="With --chord, only bindings that differ from the base mappings")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+
+    for root in args.ingest or []:
+        start = time.perf_counter()
+        scanned, updated, parsed, removed = ingest(conn, root)
+        print(f"Indexed {root}: {scanned} archives scanned, {updated} updated, {parsed} parsed, "
+              f"{removed} removed in {time.perf_counter() - start:.2f}s")
+
+    if args.chord:
+        start = time.perf_counter()
+        rows = query_chord(conn, args.chord, args.app, args.rebound)
+        for user, app, path, command in rows:
+            print(f"{user}\t{app}\t{command}\t{path}")
+        print(f"{len(rows)} bindings ({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+
+    if args.command:
+        start = time.perf_counter()
+        rows = query_command(conn, args.command, args.app)
+        for user, app, path, code, shift, mod1, mod2 in rows:
+            mods = "+".join(n for n, on in (("Ctrl", mod1), ("Alt", mod2), ("Shift", shift)) if on)
+            key = code[len("KEY_"):] if code.startswith("KEY_") else code
+            print(f"{user}\t{app}\t{mods + '+' if mods else ''}{key}\t{path}")
+        print(f"{len(rows)} bindings ({(time.perf_counter() - start) * 1000:.1f} ms)", file=sys.stderr)
+
+    conn.close()
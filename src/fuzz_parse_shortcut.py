@@ -0,0 +1,164 @@
+import io
+import sys
+import time
+import random
+import argparse
+import contextlib
+import xml.etree.ElementTree as ET
+
+from generate_config import KEY_MAP, BLOCKED_SHORTCUTS, compile_mappings, create_xml_from_items
+
+ACCEL_NS = "{http://openoffice.org/2001/accel}"
+XLINK_NS = "{http://www.w3.org/1999/xlink}"
+
+MODIFIERS = [("Ctrl", "mod1"), ("Alt", "mod2"), ("Shift", "shift")]
+
+def random_case(rng, word):
+    choice = rng.randrange(3)
+    if choice == 0:
+        return word.upper()
+    if choice == 1:
+        return word.lower()
+    return word
+
+def generate_case(rng, keys, spaces=False):
+    """
+    Return (shortcut_string, expected_chord) for a random modifier set and key.
+    expected_chord is (code, shift, mod1, mod2).
+    """
+    key = rng.choice(keys)
+    mods = [m for m in MODIFIERS if rng.random() < 0.5]
+    rng.shuffle(mods)
+
+    parts = [random_case(rng, name) for name, _ in mods] + [random_case(rng, key)]
+    separator = rng.choice(["+", " + ", "+ "]) if spaces else "+"
+    shortcut = separator.join(parts)
+
+    flags = {flag for _, flag in mods}
+    expected = (KEY_MAP[key.upper()], "shift" in flags, "mod1" in flags, "mod2" in flags)
+    return shortcut, expected
+
+MALFORMED_KINDS = ["multi-key", "unknown-key", "reordered"]
+
+def generate_malformed(rng, keys, spaces=False):
+    """
+    Return (shortcut_string, None) for an input parse_shortcut must reject:
+    several keys ("Ctrl+A+B"), an unknown key name ("Ctrl+Foo") or a modifier
+    after the key ("A+Ctrl").
+    """
+    kind = rng.choice(MALFORMED_KINDS)
+    mods = [random_case(rng, name) for name, _ in MODIFIERS if rng.random() < 0.5]
+    key = random_case(rng, rng.choice(keys))
+
+    if kind == "multi-key":
+        parts = mods + [key, random_case(rng, rng.choice(keys))]
+    elif kind == "unknown-key":
+        while True:
+            token = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(2, 8)))
+            if token not in KEY_MAP and token not in ("CTRL", "ALT", "SHIFT"):
+                break
+        parts = mods + [random_case(rng, token)]
+    else:
+        mods = mods or [random_case(rng, rng.choice(MODIFIERS)[0])]
+        split = rng.randrange(len(mods))
+        parts = mods[:split] + [key] + mods[split:]
+
+    separator = rng.choice(["+", " + ", "+ "]) if spaces else "+"
+    return separator.join(parts), None
+
+def is_blocked(shortcut):
+    return shortcut.upper().replace(" ", "") in BLOCKED_SHORTCUTS
+
+def read_back(xml_content):
+    """Parse accelerator XML the way verify_cfg does."""
+    root = ET.fromstring(xml_content)
+    chords = []
+    for item in root.iter(f"{ACCEL_NS}item"):
+        chords.append((
+            item.get(f"{ACCEL_NS}code"),
+            item.get(f"{ACCEL_NS}shift") == "true",
+            item.get(f"{ACCEL_NS}mod1") == "true",
+            item.get(f"{ACCEL_NS}mod2") == "true",
+        ))
+    return chords
+
+def round_trip(cases):
+    """
+    Run a batch of (shortcut, expected) cases through XML; return the failures.
+    expected None means the shortcut must be left out and reported.
+    """
+    mappings = [{"ms_shortcut": s, "uno_command": f".uno:Fuzz{i}"} for i, (s, _) in enumerate(cases)]
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        items = compile_mappings(mappings)
+    reported = set(log.getvalue().splitlines())
+    chords = read_back(create_xml_from_items(items))
+
+    got = {}
+    for (code, shift, mod1, mod2, command), chord in zip(items, chords):
+        got[int(command[len(".uno:Fuzz"):])] = chord
+
+    failures = []
+    for i, (shortcut, expected) in enumerate(cases):
+        actual = got.get(i)
+        if actual != expected:
+            failures.append((shortcut, expected, actual))
+        elif expected is None and f"Warning: Could not parse key for {shortcut}" not in reported:
+            failures.append((shortcut, expected, "rejected without a warning"))
+    return failures
+
+def run(count, batch_size, seed, spaces=False, malformed=0.0):
+    rng = random.Random(seed)
+    keys = sorted(k for k in KEY_MAP)
+    # "+" doubles as the separator, so it would blur which parts a malformed input has
+    plain_keys = [k for k in keys if k not in ("+", "PLUS")]
+    failures = []
+    checked = 0
+
+    start = time.perf_counter()
+    while checked < count:
+        cases = []
+        while len(cases) < min(batch_size, count - checked):
+            if rng.random() < malformed:
+                shortcut, expected = generate_malformed(rng, plain_keys, spaces)
+            else:
+                shortcut, expected = generate_case(rng, keys, spaces)
+            # Blocked shortcuts are dropped on purpose
+            if not is_blocked(shortcut):
+                cases.append((shortcut, expected))
+        failures.extend(round_trip(cases))
+        checked += len(cases)
+    elapsed = time.perf_counter() - start
+
+    return checked, failures, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round-trip random shortcuts through parse_shortcut and the accelerator XML")
+    parser.add_argument("--count", type=int, default=1000000, help="Number of shortcuts to check")
+    parser.add_argument("--batch", type=int, default=5000, help="Shortcuts per generated XML document")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--spaces", action="store_true", help="Also generate spaced separators such as 'Ctrl + S'")
+    parser.add_argument("--malformed", type=float, default=0.1,
+                        help="Fraction of inputs with several keys, unknown keys or misplaced modifiers, which must be rejected")
+    parser.add_argument("--min-rate", type=float, help="Fail if fewer shortcuts per second are checked")
+    parser.add_argument("--show", type=int, default=20, help="Number of failures to print")
+    args = parser.parse_args()
+
+    checked, failures, elapsed = run(args.count, args.batch, args.seed, args.spaces, args.malformed)
+    rate = checked / elapsed if elapsed else float("inf")
+
+    print(f"Checked {checked} shortcuts in {elapsed:.2f}s ({rate:,.0f} shortcuts/s)")
+
+    failed = False
+    if failures:
+        failed = True
+        print(f"FAILED: {len(failures)} shortcuts did not round-trip")
+        for shortcut, expected, actual in failures[:args.show]:
+            print(f"  - {shortcut!r}: expected {expected}, got {actual}")
+    if args.min_rate and rate < args.min_rate:
+        failed = True
+        print(f"FAILED: rate {rate:,.0f}/s is below --min-rate {args.min_rate:,.0f}/s")
+
+    if failed:
+        sys.exit(1)
+    print("All shortcuts round-tripped.")
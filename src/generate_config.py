@@ -1,10 +1,18 @@
+import io
 import json
 import os
 import zipfile
 import argparse
+import contextlib
+import concurrent.futures
+import functools
 import sys
+import tempfile
 import xml.sax.saxutils
 
+import keymap_cache
+import uno_catalog
+
 # Key Mappings
 KEY_MAP = {
     "SPACE": "KEY_SPACE",
@@ -28,6 +36,7 @@ KEY_MAP = {
     "PLUS": "KEY_ADD",   # Alias
     "-": "KEY_SUBTRACT", # Numpad -
     "MINUS": "KEY_SUBTRACT",
+    "_": "KEY_SUBTRACT", # Shift handled separately
     "=": "KEY_EQUAL",
     "EQUAL": "KEY_EQUAL",
     ".": "KEY_POINT",
@@ -59,11 +68,91 @@ BLOCKED_SHORTCUTS = {
     "CTRL+ESC", "WIN", "META"
 }
 
+# Per-application sources, outputs and LibreOffice module identifiers
+APPS = {
+    "writer": {
+        "name": "Writer",
+        "mappings": "mappings/writer.json",
+        "defaults": "defaults/writer.json",
+        "output": "dist/Word_Shortcuts_for_Writer.cfg",
+        "module": "com.sun.star.text.TextDocument",
+        "catalog": "swriter",
+        "odf_ext": "odt",
+    },
+    "calc": {
+        "name": "Calc",
+        "mappings": "mappings/calc.json",
+        "defaults": "defaults/calc.json",
+        "output": "dist/Excel_Shortcuts_for_Calc.cfg",
+        "module": "com.sun.star.sheet.SpreadsheetDocument",
+        "catalog": "scalc",
+        "odf_ext": "ods",
+    },
+    "impress": {
+        "name": "Impress",
+        "mappings": "mappings/impress.json",
+        "defaults": "defaults/impress.json",
+        "output": "dist/PowerPoint_Shortcuts_for_Impress.cfg",
+        "module": "com.sun.star.presentation.PresentationDocument",
+        "catalog": "simpress",
+        "odf_ext": "odp",
+    },
+}
+
+# Keyboard layouts for --layouts. Mappings are written for the US key positions,
+# as in the MS Office documentation; each table maps the KEY_* code of a US
+# punctuation key to the code LibreOffice sees from the same physical key on that
+# layout (None if that key is a dead key, has no code, or types a letter or digit).
+# Letters and digits keep their codes, since Office binds them by character on
+# every layout, so punctuation never moves onto them.
+LAYOUTS = {
+    "qwerty": {},
+    "azerty": {
+        "KEY_SEMICOLON": None,     # M (letter)
+        "KEY_COMMA": "KEY_SEMICOLON",
+        "KEY_POINT": "KEY_COLON",
+        "KEY_BRACKETLEFT": None,   # ^ (dead key)
+        "KEY_BRACKETRIGHT": None,  # $
+        "KEY_QUOTELEFT": None,     # ²
+    },
+    "qwertz": {
+        "KEY_SEMICOLON": None,     # ö
+        "KEY_BRACKETLEFT": None,   # ü
+        "KEY_BRACKETRIGHT": "KEY_ADD",
+        "KEY_EQUAL": None,         # ´ (dead key)
+        "KEY_QUOTELEFT": None,     # ^ (dead key)
+    },
+}
+
+# Whole-chord translations applied before LAYOUTS, for shortcuts that localized
+# Office binds by character rather than by key position.
+LAYOUT_CHORDS = {
+    "azerty": {
+        # French Excel: Ctrl+; inserts the date (the ; key), Ctrl+: the time
+        ("KEY_SEMICOLON", False, True, False): ("KEY_SEMICOLON", False, True, False),
+        ("KEY_SEMICOLON", True, True, False): ("KEY_COLON", False, True, False),
+    },
+    "qwertz": {
+        # German Excel: Strg+. inserts the date, Strg+Umschalt+. the time,
+        # Strg++ inserts cells (and is Superscript in Word)
+        ("KEY_SEMICOLON", False, True, False): ("KEY_POINT", False, True, False),
+        ("KEY_SEMICOLON", True, True, False): ("KEY_POINT", True, True, False),
+        ("KEY_EQUAL", True, True, False): ("KEY_ADD", False, True, False),
+    },
+}
+
+EXTENSION_ID = "org.libreoffice.ms-office-shortcuts"
+EXTENSION_VERSION = "1.0.0"
+
+# Bump when parse_shortcut changes behaviour so compiled keymaps are rebuilt
+PARSER_VERSION = 3
+
 def parse_shortcut(shortcut_str):
     # Handle Ctrl++ case where split("+") creates empty strings
     # "Ctrl++" -> ["Ctrl", "", ""]
     # "Ctrl+Shift++" -> ["Ctrl", "Shift", "", ""]
-    parts = shortcut_str.upper().split("+")
+    # Spaces around separators ("Ctrl + S") are not part of any key name
+    parts = shortcut_str.upper().replace(" ", "").split("+")
 
     modifiers = {
         "shift": "false",
@@ -98,7 +187,10 @@ def parse_shortcut(shortcut_str):
 
     # Re-process cleaned parts
     final_parts = []
+    modifier_after_key = False
     for part in cleaned_parts:
+        if part in ("CTRL", "ALT", "SHIFT") and final_parts:
+            modifier_after_key = True
         if part == "CTRL":
             modifiers["mod1"] = "true"
         elif part == "ALT":
@@ -114,31 +206,20 @@ def parse_shortcut(shortcut_str):
         # Maybe it was just "+" ?
         if "+" in shortcut_str and "CTRL" not in shortcut_str.upper():
              code = KEY_MAP["+"]
-    elif len(final_parts) == 1:
-        key = final_parts[0]
-        if key in KEY_MAP:
-            code = KEY_MAP[key]
-        else:
-            code = f"KEY_{key}"
-    else:
-        # Multiple non-modifier keys? Error.
-        # But wait, maybe the loop logic above missed something.
-        # Let's trust that the last part is the key.
-        key = final_parts[-1]
-        if key in KEY_MAP:
-            code = KEY_MAP[key]
-        else:
-            code = f"KEY_{key}"
+    elif len(final_parts) == 1 and not modifier_after_key:
+        # Unknown key names are rejected rather than turned into made-up KEY_* codes
+        code = KEY_MAP.get(final_parts[0])
+    # Several keys ("Ctrl+A+B") or modifiers after the key ("A+Ctrl") leave code None
 
     return code, modifiers
 
-def create_xml(mappings):
-    lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<!DOCTYPE accel:acceleratorlist PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "accelerator.dtd">',
-        '<accel:acceleratorlist xmlns:accel="http://openoffice.org/2001/accel" xmlns:xlink="http://www.w3.org/1999/xlink">'
-    ]
-
+def compile_mappings(mappings):
+    """
+    Resolve mapping entries into accelerator items.
+    Returns a list of (code, shift, mod1, mod2, command) tuples; blocked and
+    unparseable shortcuts are skipped.
+    """
+    items = []
     for mapping in mappings:
         shortcut = mapping["ms_shortcut"]
         command = mapping["uno_command"]
@@ -155,22 +236,108 @@ def create_xml(mappings):
             print(f"Warning: Could not parse key for {shortcut}")
             continue
 
-        # Escape special characters in XML attributes
-        command_escaped = xml.sax.saxutils.escape(command)
-        code_escaped = xml.sax.saxutils.escape(code)
-
-        attr_str = f'accel:code="{code_escaped}" xlink:href="{command_escaped}"'
-        if modifiers["shift"] == "true":
-            attr_str += ' accel:shift="true"'
-        if modifiers["mod1"] == "true":
-            attr_str += ' accel:mod1="true"'
-        if modifiers["mod2"] == "true":
-            attr_str += ' accel:mod2="true"'
+        items.append((
+            code,
+            modifiers["shift"] == "true",
+            modifiers["mod1"] == "true",
+            modifiers["mod2"] == "true",
+            command,
+        ))
+    return items
 
-        lines.append(f' <accel:item {attr_str}/>')
-
-    lines.append('</accel:acceleratorlist>')
-    return "\n".join(lines)
+def create_xml(mappings):
+    return create_xml_from_items(compile_mappings(mappings))
+
+XML_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<!DOCTYPE accel:acceleratorlist PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "accelerator.dtd">\n'
+    '<accel:acceleratorlist xmlns:accel="http://openoffice.org/2001/accel" xmlns:xlink="http://www.w3.org/1999/xlink">'
+).encode("utf-8")
+XML_TAIL = b'\n</accel:acceleratorlist>'
+
+@functools.lru_cache(maxsize=None)
+def render_item(code, shift, mod1, mod2, command):
+    """
+    Rendered and escaped <accel:item> line (with its leading newline) as bytes.
+    Cached, so each distinct (chord, command) is formatted only once per process.
+    """
+    # Escape special characters in XML attributes
+    command_escaped = xml.sax.saxutils.escape(command, {'"': "&quot;"})
+    code_escaped = xml.sax.saxutils.escape(code, {'"': "&quot;"})
+
+    attr_str = f'accel:code="{code_escaped}" xlink:href="{command_escaped}"'
+    if shift:
+        attr_str += ' accel:shift="true"'
+    if mod1:
+        attr_str += ' accel:mod1="true"'
+    if mod2:
+        attr_str += ' accel:mod2="true"'
+
+    return f'\n <accel:item {attr_str}/>'.encode("utf-8")
+
+def create_xml_bytes(items):
+    return XML_HEAD + b"".join(render_item(*item) for item in items) + XML_TAIL
+
+def create_xml_from_items(items):
+    return create_xml_bytes(items).decode("utf-8")
+
+class VariantBuilder:
+    """
+    Assembles accelerator XML for many variants of one base item list.
+    The base document is rendered once; a variant is produced by splicing the
+    rendered fragments of its changed chords into the base bytes, so the
+    per-variant work grows with the size of the delta, not of the base map.
+    """
+
+    def __init__(self, base_items):
+        body = []
+        self.spans = {}  # chord -> list of (start, end) byte offsets in self.base
+        offset = len(XML_HEAD)
+        for code, shift, mod1, mod2, command in base_items:
+            fragment = render_item(code, shift, mod1, mod2, command)
+            self.spans.setdefault((code, shift, mod1, mod2), []).append((offset, offset + len(fragment)))
+            body.append(fragment)
+            offset += len(fragment)
+        self.base = XML_HEAD + b"".join(body) + XML_TAIL
+        self.body_end = offset
+
+    def build(self, items, removed=()):
+        """
+        items: variant (code, shift, mod1, mod2, command) bindings; a chord already
+        in the base is replaced in place, a new chord is appended.
+        removed: chords to drop from the base.
+        """
+        # Later variant bindings win, and a binding overrides a removal of the same chord
+        bindings = {item[:4]: item for item in items}
+
+        edits = []  # (start, end, replacement)
+        appended = []
+        for chord in removed:
+            if chord in bindings:
+                continue
+            for start, end in self.spans.get(chord, ()):
+                edits.append((start, end, b""))
+        for item in bindings.values():
+            spans = self.spans.get(item[:4])
+            fragment = render_item(*item)
+            if spans is None:
+                appended.append(fragment)
+                continue
+            # Duplicate chords in the base collapse into the variant's binding
+            edits.append((spans[0][0], spans[0][1], fragment))
+            for start, end in spans[1:]:
+                edits.append((start, end, b""))
+
+        out = []
+        pos = 0
+        for start, end, replacement in sorted(edits):
+            out.append(self.base[pos:start])
+            out.append(replacement)
+            pos = end
+        out.append(self.base[pos:self.body_end])
+        out.extend(appended)
+        out.append(XML_TAIL)
+        return b"".join(out)
 
 def create_manifest():
     return """<?xml version="1.0" encoding="UTF-8"?>
@@ -180,7 +347,7 @@ def create_manifest():
  <manifest:file-entry manifest:full-path="Configurations2/accelerator/current.xml" manifest:media-type=""/>
 </manifest:manifest>"""
 
-def generate_package(json_path, output_path, defaults_path=None):
+def merge_mappings(json_path, defaults_path=None):
     print(f"Reading {json_path}...")
     with open(json_path, 'r') as f:
         custom_mappings = json.load(f)
@@ -209,118 +376,644 @@ def generate_package(json_path, output_path, defaults_path=None):
     else:
         final_mappings = custom_mappings
 
-    xml_content = create_xml(final_mappings)
-    manifest_content = create_manifest()
+    return final_mappings
+
+def keymap_salt():
+    # Parser tables are part of the cache key, so editing them invalidates compiled keymaps
+    return repr((PARSER_VERSION, sorted(KEY_MAP.items()), sorted(BLOCKED_SHORTCUTS))).encode("utf-8")
 
-    with zipfile.ZipFile(output_path, 'w') as zf:
+def load_items(json_path, defaults_path=None, use_cache=True):
+    """
+    Merge and compile a mapping file (and its defaults) into accelerator items,
+    reusing the compiled keymap stored next to the mapping file when it is fresh.
+    """
+    sources = [json_path]
+    if defaults_path and os.path.exists(defaults_path):
+        sources.append(defaults_path)
+    cache_path = keymap_cache.cache_path_for(json_path)
+    salt = keymap_salt()
+
+    items = None
+    if use_cache:
+        items = keymap_cache.load_keymap(cache_path, sources, salt)
+        if items is not None:
+            print(f"Using compiled keymap {cache_path}")
+
+    if items is None:
+        items = compile_mappings(merge_mappings(json_path, defaults_path))
+
+        if use_cache:
+            try:
+                keymap_cache.write_keymap(cache_path, items, sources, salt)
+            except OSError as e:
+                print(f"Warning: Could not write compiled keymap {cache_path}: {e}")
+
+    check_commands(items, catalog_module_for(json_path))
+    return items
+
+def catalog_module_for(json_path):
+    """Catalog module of the application whose mapping file is json_path, if any."""
+    for app in APPS.values():
+        if os.path.abspath(app["mappings"]) == os.path.abspath(json_path):
+            return app["catalog"]
+    return None
+
+def check_commands(items, module=None):
+    """Warn about UNO commands missing from the command catalog."""
+    catalog = uno_catalog.load_catalog()
+    if catalog is None:
+        return
+    for command in catalog.invalid_commands((item[4] for item in items), module):
+        hint = ", ".join(catalog.suggest(command, module)) or "no close match"
+        print(f"Warning: Unknown UNO command {command} (did you mean: {hint})")
+
+def package_bytes(xml_content, manifest_content):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as zf:
         # Mimetype should be first and uncompressed
         zf.writestr("mimetype", "application/vnd.sun.xml.ui.configuration", compress_type=zipfile.ZIP_STORED)
         zf.writestr("Configurations2/accelerator/current.xml", xml_content)
         zf.writestr("META-INF/manifest.xml", manifest_content)
+    return buf.getvalue()
+
+def build_package(json_path, defaults_path=None, use_cache=True):
+    """The .cfg archive for a mapping file (and its defaults) as bytes."""
+    items = load_items(json_path, defaults_path, use_cache)
+    return package_bytes(create_xml_bytes(items), create_manifest())
+
+def write_package(stream, json_path, defaults_path=None, use_cache=True):
+    """Write the .cfg archive to any binary stream, e.g. an upload body or sys.stdout.buffer."""
+    stream.write(build_package(json_path, defaults_path, use_cache))
+    stream.flush()
+
+def generate_package(json_path, output_path, defaults_path=None, use_cache=True):
+    # A LibreOffice instance loading the .cfg never sees a half-written archive
+    atomic_write(output_path, build_package(json_path, defaults_path, use_cache))
+
+    print(f"Generated {output_path}")
+
+def accelerator_node_name(code, shift, mod1, mod2):
+    # Accelerators.xcu keys look like "S_SHIFT_MOD1" or "F5"
+    name = code[len("KEY_"):] if code.startswith("KEY_") else code
+    if shift:
+        name += "_SHIFT"
+    if mod1:
+        name += "_MOD1"
+    if mod2:
+        name += "_MOD2"
+    return name
+
+def create_accelerators_component(module_items):
+    """
+    module_items: dict of LibreOffice module identifier -> accelerator items.
+    Returns the Accelerators component-data element shared by .xcu and .xcd output.
+    """
+    lines = [
+        '<oor:component-data oor:name="Accelerators" oor:package="org.openoffice.Office" xmlns:oor="http://openoffice.org/2001/registry" xmlns:xs="http://www.w3.org/2001/XMLSchema">',
+        ' <node oor:name="PrimaryKeys">',
+        '  <node oor:name="Modules">',
+    ]
+
+    for module, items in module_items.items():
+        lines.append(f'   <node oor:name="{xml.sax.saxutils.escape(module)}">')
+        nodes = {}
+        for code, shift, mod1, mod2, command in items:
+            node_name = accelerator_node_name(code, shift, mod1, mod2)
+            # Later entries win, matching how custom mappings override defaults
+            if node_name in nodes:
+                print(f"Warning: {module} binds {node_name} more than once, using {command}")
+            nodes[node_name] = command
+        for node_name, command in nodes.items():
+            lines.append(f'    <node oor:name="{xml.sax.saxutils.escape(node_name)}" oor:op="replace">')
+            lines.append(f'     <prop oor:name="Command"><value xml:lang="en-US">{xml.sax.saxutils.escape(command)}</value></prop>')
+            lines.append('    </node>')
+        lines.append('   </node>')
+
+    lines.append('  </node>')
+    lines.append(' </node>')
+    lines.append('</oor:component-data>')
+    return "\n".join(lines)
+
+def create_extension_manifest():
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<manifest:manifest xmlns:manifest="http://openoffice.org/2001/manifest">
+ <manifest:file-entry manifest:full-path="Accelerators.xcu" manifest:media-type="application/vnd.sun.star.configuration-data"/>
+</manifest:manifest>"""
+
+def create_extension_description():
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<description xmlns="http://openoffice.org/extensions/description/2006" xmlns:xlink="http://www.w3.org/1999/xlink">
+ <identifier value="{EXTENSION_ID}"/>
+ <version value="{EXTENSION_VERSION}"/>
+ <display-name>
+  <name lang="en">MS Office Shortcuts for LibreOffice</name>
+ </display-name>
+</description>"""
+
+def load_module_items(apps=None, use_cache=True):
+    """
+    Merge and compile the mappings of each application.
+    Returns a dict of LibreOffice module identifier -> accelerator items.
+    """
+    module_items = {}
+    for app_key in (apps or APPS):
+        app = APPS[app_key]
+        if not os.path.exists(app["mappings"]):
+            print(f"Mapping file {app['mappings']} not found, skipping {app['name']}.")
+            continue
+        module_items[app["module"]] = load_items(app["mappings"], app["defaults"], use_cache)
+    return module_items
+
+def ensure_parent_dir(output_path):
+    out_dir = os.path.dirname(output_path)
+    if out_dir and not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+def generate_extension(output_path, apps=None, use_cache=True):
+    """
+    Bundle the Writer, Calc and Impress accelerators into a single .oxt
+    that can be installed with `unopkg add --shared`.
+    """
+    module_items = load_module_items(apps, use_cache)
+    xcu_content = '<?xml version="1.0" encoding="UTF-8"?>\n' + create_accelerators_component(module_items)
+
+    ensure_parent_dir(output_path)
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("META-INF/manifest.xml", create_extension_manifest())
+        zf.writestr("description.xml", create_extension_description())
+        zf.writestr("Accelerators.xcu", xcu_content)
+
+    print(f"Generated {output_path}")
+
+def generate_registry_layer(output_path, apps=None, use_cache=True):
+    """
+    Write the merged accelerators as an .xcd configuration layer.
+    Copied into <install>/share/registry/, it is read once at install scope
+    instead of being written into every user profile.
+    """
+    module_items = load_module_items(apps, use_cache)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<oor:data xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:oor="http://openoffice.org/2001/registry">',
+        '<dependency file="main"/>',
+        create_accelerators_component(module_items),
+        '</oor:data>',
+    ]
+
+    ensure_parent_dir(output_path)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
 
     print(f"Generated {output_path}")
 
+def generate_variants(app_key, variants_dir, output_dir, use_cache=True):
+    """
+    Build one .cfg per JSON file in variants_dir. Each variant file lists only
+    the mappings that differ from the application's merged base mappings; an
+    entry with an empty "uno_command" unbinds that shortcut.
+    """
+    app = APPS[app_key]
+    builder = VariantBuilder(load_items(app["mappings"], app["defaults"], use_cache))
+    manifest_content = create_manifest()
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    count = 0
+    for name in sorted(os.listdir(variants_dir)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(variants_dir, name), 'r') as f:
+            delta = json.load(f)
+
+        removed = [chord_of(m["ms_shortcut"]) for m in delta if not m.get("uno_command")]
+        items = compile_mappings([m for m in delta if m.get("uno_command")])
+
+        output_path = os.path.join(output_dir, os.path.splitext(name)[0] + ".cfg")
+        atomic_write(output_path, package_bytes(builder.build(items, removed), manifest_content))
+        count += 1
+
+    print(f"Generated {count} {app['name']} variants in {output_dir}")
+
+def is_character_key(code):
+    """Letter and digit codes, e.g. KEY_M or KEY_5."""
+    name = code[len("KEY_"):]
+    return len(name) == 1 and name.isalnum()
+
+def translate_items(items, layout):
+    """
+    Move already-parsed items onto the keys of a layout: first whole chords from
+    LAYOUT_CHORDS, then single keys from LAYOUTS.
+    Returns (items, warnings); items whose key does not exist on the layout, or
+    whose translated chord is already taken, are dropped with a warning.
+    """
+    table = LAYOUTS[layout]
+    overrides = LAYOUT_CHORDS.get(layout, {})
+
+    # Target chord per item (None: no key on this layout) and whether it moved
+    targets = []
+    for code, shift, mod1, mod2, command in items:
+        chord = (code, shift, mod1, mod2)
+        if chord in overrides:
+            targets.append((overrides[chord], "chord"))
+        elif code not in table:
+            targets.append((chord, None))
+        elif table[code] is None or is_character_key(table[code]):
+            targets.append((None, "key"))
+        else:
+            targets.append(((table[code], shift, mod1, mod2), "key"))
+
+    # Untranslated chords keep their keys, then chord translations take priority
+    # over single-key ones; a moved chord never displaces an earlier claim
+    occupied = {target for target, moved in targets if moved is None}
+    placed = {}
+    warnings = []
+    for kind in ("chord", "key"):
+        for i, (target, moved) in enumerate(targets):
+            if moved != kind:
+                continue
+            name = accelerator_node_name(*items[i][:4])
+            command = items[i][4]
+            if target is None:
+                warnings.append(f"{name} ({command}) has no key on {layout}, skipping")
+            elif target in occupied and target != items[i][:4]:
+                warnings.append(f"{name} ({command}) would become {accelerator_node_name(*target)}, "
+                                f"which is already bound on {layout}, skipping")
+            else:
+                occupied.add(target)
+                placed[i] = target
+
+    translated = []
+    for i, (target, moved) in enumerate(targets):
+        if moved is None:
+            translated.append(items[i])
+        elif i in placed:
+            translated.append(placed[i] + (items[i][4],))
+    return translated, warnings
+
+def generate_layouts(layouts=None, apps=None, output_dir="dist", use_cache=True):
+    """
+    Write every app x layout combination to <output_dir>/<layout>/<cfg>.
+    Mappings are parsed and merged once per application; the archives are
+    translated and written in parallel.
+    """
+    layouts = layouts or list(LAYOUTS)
+    apps = [a for a in (apps or APPS) if os.path.exists(APPS[a]["mappings"])]
+    app_items = {a: load_items(APPS[a]["mappings"], APPS[a]["defaults"], use_cache) for a in apps}
+    manifest_content = create_manifest()
+
+    def build(app_key, layout):
+        items, warnings = translate_items(app_items[app_key], layout)
+        output_path = os.path.join(output_dir, layout, os.path.basename(APPS[app_key]["output"]))
+        ensure_parent_dir(output_path)
+        atomic_write(output_path, package_bytes(create_xml_bytes(items), manifest_content))
+        return output_path, warnings
+
+    jobs = [(a, l) for a in apps for l in layouts]
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        results = list(pool.map(lambda job: build(*job), jobs))
+
+    # Report in matrix order once all archives are written
+    for (app_key, layout), (output_path, warnings) in zip(jobs, results):
+        for warning in warnings:
+            print(f"Warning: [{APPS[app_key]['name']}/{layout}] {warning}")
+        print(f"Generated {output_path}")
+
+PAGE_SIZE = 20
+
+def chord_of(shortcut):
+    """Normalized (code, shift, mod1, mod2) for a shortcut string, or None if it cannot be parsed."""
+    code, modifiers = parse_shortcut(shortcut)
+    if not code:
+        return None
+    return (code, modifiers["shift"] == "true", modifiers["mod1"] == "true", modifiers["mod2"] == "true")
+
+class MappingIndex:
+    """
+    Mapping list with lookup tables by chord, command name and UNO command.
+    Positions into `mappings` stay stable; deleted entries are set to None.
+    """
+
+    def __init__(self, mappings):
+        self.mappings = []
+        self.by_chord = {}
+        self.by_name = {}
+        self.by_uno = {}
+        for mapping in mappings:
+            self.add(mapping)
+
+    def _index(self, idx):
+        m = self.mappings[idx]
+        self.by_chord.setdefault(chord_of(m["ms_shortcut"]), set()).add(idx)
+        self.by_name.setdefault(m["command_name"].lower(), set()).add(idx)
+        self.by_uno.setdefault(m["uno_command"].lower(), set()).add(idx)
+
+    def _unindex(self, idx):
+        m = self.mappings[idx]
+        for table, key in ((self.by_chord, chord_of(m["ms_shortcut"])),
+                           (self.by_name, m["command_name"].lower()),
+                           (self.by_uno, m["uno_command"].lower())):
+            table[key].discard(idx)
+            if not table[key]:
+                del table[key]
+
+    def add(self, mapping):
+        self.mappings.append(mapping)
+        idx = len(self.mappings) - 1
+        self._index(idx)
+        return idx
+
+    def remove(self, idx):
+        self._unindex(idx)
+        self.mappings[idx] = None
+
+    def set_shortcut(self, idx, shortcut):
+        self._unindex(idx)
+        self.mappings[idx]["ms_shortcut"] = shortcut
+        self._index(idx)
+
+    def conflicts(self, shortcut, exclude=None):
+        chord = chord_of(shortcut)
+        if chord is None:
+            return []
+        return sorted(i for i in self.by_chord.get(chord, ()) if i != exclude)
+
+    def live(self):
+        return [i for i, m in enumerate(self.mappings) if m is not None]
+
+    def search(self, term):
+        """
+        Exact chord or UNO command matches use the indexes; anything else
+        falls back to a case-insensitive substring match on name and command.
+        """
+        term = term.strip()
+        if not term:
+            return self.live()
+
+        lowered = term.lower()
+        if lowered in self.by_uno:
+            return sorted(self.by_uno[lowered])
+        if lowered in self.by_name:
+            return sorted(self.by_name[lowered])
+        if "+" in term or term.upper() in KEY_MAP:
+            chord = chord_of(term)
+            if chord in self.by_chord:
+                return sorted(self.by_chord[chord])
+
+        return [
+            i for i, m in enumerate(self.mappings)
+            if m is not None and (lowered in m["command_name"].lower() or lowered in m["uno_command"].lower())
+        ]
+
+def format_mapping_line(mapping):
+    return "    { " + json.dumps(mapping)[1:-1] + " }"
+
+def parse_entry_line(line):
+    """The mapping on a one-entry-per-line line, or None if the line is not a whole entry."""
+    try:
+        entry = json.loads(line.strip().rstrip(","))
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) else None
+
+def format_mappings_json(mappings, original_text=None):
+    """
+    Render mappings one per line, matching the layout of the files in mappings/.
+    `mappings` may contain None for deleted entries. When original_text has one
+    entry per line for the first entries, untouched lines and blank-line
+    grouping are kept so a save only changes the edited entries.
+    """
+    lines = original_text.splitlines() if original_text else []
+    entry_lines = [i for i, line in enumerate(lines) if line.strip().startswith("{")]
+    originals = [parse_entry_line(lines[i]) for i in entry_lines]
+    # Any other layout (e.g. json.dump with indent=4) is rewritten as a whole
+    if (not lines or len(entry_lines) > len(mappings) or lines[-1].strip() != "]"
+            or any(o is None for o in originals)):
+        lines = ["[", "]"]
+        entry_lines = []
+    entry_index = {line_no: i for i, line_no in enumerate(entry_lines)}
+
+    out = []
+    entry_positions = []
+    for line_no, line in enumerate(lines[:-1]):
+        if line_no not in entry_index:
+            out.append(line)
+            continue
+        index = entry_index[line_no]
+        mapping = mappings[index]
+        if mapping is None:
+            continue
+        original = line.rstrip().rstrip(",")
+        if originals[index] != mapping:
+            original = format_mapping_line(mapping)
+        entry_positions.append(len(out))
+        out.append(original)
+
+    for mapping in mappings[len(entry_lines):]:
+        if mapping is not None:
+            entry_positions.append(len(out))
+            out.append(format_mapping_line(mapping))
+
+    for pos in entry_positions[:-1]:
+        out[pos] += ","
+    out.append(lines[-1])
+    return "\n".join(out) + "\n"
+
+# os.umask can only be read by setting it, which is not thread-safe; read it once at import
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+def atomic_write(path, data):
+    """Write bytes to path via a temporary file in the same directory and os.replace."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates 0600; keep the existing file's mode, or honour the umask for a new file
+        if os.path.exists(path):
+            mode = os.stat(path).st_mode & 0o777
+        else:
+            mode = 0o666 & ~UMASK
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def describe_shortcut(index, shortcut, defaults_index=None, exclude=None):
+    """Print immediate feedback about a proposed shortcut. Returns False if it cannot be used."""
+    if shortcut.upper().replace(" ", "") in BLOCKED_SHORTCUTS:
+        print(f"  ! {shortcut} is a blocked system shortcut and will not be exported.")
+        return False
+    if chord_of(shortcut) is None:
+        print(f"  ! Could not parse key for {shortcut}")
+        return False
+
+    for i in index.conflicts(shortcut, exclude):
+        m = index.mappings[i]
+        print(f"  ! Conflicts with #{i + 1} {m['command_name']} -> {m['ms_shortcut']} ({m['uno_command']})")
+    if defaults_index is not None:
+        for i in defaults_index.conflicts(shortcut):
+            m = defaults_index.mappings[i]
+            print(f"  * Overrides default {m['command_name']} ({m['uno_command']})")
+    return True
+
 def interactive_mode():
     print("Interactive Mode")
     print("----------------")
 
-    files = {
-        "1": ("mappings/writer.json", "Writer"),
-        "2": ("mappings/calc.json", "Calc"),
-        "3": ("mappings/impress.json", "Impress")
-    }
+    files = {str(idx + 1): app_key for idx, app_key in enumerate(APPS)}
 
     print("Select application:")
-    for k, v in files.items():
-        print(f"{k}. {v[1]}")
+    for k, app_key in files.items():
+        print(f"{k}. {APPS[app_key]['name']}")
 
     choice = input("Choice: ")
     if choice not in files:
         print("Invalid choice.")
         return
 
-    filepath, app_name = files[choice]
+    app = APPS[files[choice]]
+    filepath, app_name = app["mappings"], app["name"]
 
     if not os.path.exists(filepath):
         print(f"Mapping file {filepath} not found.")
         return
 
     with open(filepath, 'r') as f:
-        mappings = json.load(f)
+        original_text = f.read()
+    index = MappingIndex(json.loads(original_text))
+
+    defaults_index = None
+    if os.path.exists(app["defaults"]):
+        with open(app["defaults"], 'r') as f:
+            defaults_index = MappingIndex(json.load(f))
+
+    view = index.live()
+    filter_term = ""
+    page = 0
 
     while True:
-        print(f"\nCurrent Mappings for {app_name}:")
-        for idx, m in enumerate(mappings):
+        pages = max(1, (len(view) + PAGE_SIZE - 1) // PAGE_SIZE)
+        page = min(page, pages - 1)
+        title = f"\nMappings for {app_name}"
+        if filter_term:
+            title += f" matching '{filter_term}'"
+        print(f"{title} (page {page + 1}/{pages}, {len(view)} shown):")
+        for idx in view[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]:
+            m = index.mappings[idx]
             print(f"{idx + 1}. {m['command_name']} -> {m['ms_shortcut']} ({m['uno_command']})")
 
-        print("\nOptions: (E)dit, (A)dd, (S)ave & Exit, (Q)uit")
+        print("\nOptions: (N)ext, (P)revious, (F)ilter, (E)dit, (A)dd, (D)elete, (S)ave & Exit, (Q)uit")
         opt = input("Option: ").upper()
 
         if opt == "Q":
             break
+        elif opt == "N":
+            page = min(page + 1, pages - 1)
+        elif opt == "P":
+            page = max(page - 1, 0)
+        elif opt == "F":
+            filter_term = input("Search (shortcut, name or .uno: command, blank for all): ").strip()
+            view = index.search(filter_term)
+            page = 0
         elif opt == "S":
-            with open(filepath, 'w') as f:
-                json.dump(mappings, f, indent=4)
+            atomic_write(filepath, format_mappings_json(index.mappings, original_text).encode("utf-8"))
             print("Saved mappings.")
 
             gen = input("Generate .cfg file now? (Y/n): ").upper()
             if gen != "N":
-                # Determine output path based on app_name
                 if not os.path.exists("dist"):
                     os.makedirs("dist")
-
-                out_path = f"dist/Word_Shortcuts_for_Writer.cfg"
-                def_path = "defaults/writer.json"
-
-                if app_name == "Calc":
-                    out_path = f"dist/Excel_Shortcuts_for_Calc.cfg"
-                    def_path = "defaults/calc.json"
-                elif app_name == "Impress":
-                    out_path = f"dist/PowerPoint_Shortcuts_for_Impress.cfg"
-                    def_path = "defaults/impress.json"
-
-                generate_package(filepath, out_path, def_path)
+                generate_package(filepath, app["output"], app["defaults"])
             break
-        elif opt == "E":
-            idx = int(input("Enter number to edit: ")) - 1
-            if 0 <= idx < len(mappings):
-                item = mappings[idx]
-                print(f"Editing {item['command_name']}")
-                new_shortcut = input(f"New Shortcut (current: {item['ms_shortcut']}): ")
-                if new_shortcut:
-                    item['ms_shortcut'] = new_shortcut
-            else:
+        elif opt in ("E", "D"):
+            try:
+                idx = int(input("Enter number: ")) - 1
+            except ValueError:
+                idx = -1
+            if not (0 <= idx < len(index.mappings)) or index.mappings[idx] is None:
                 print("Invalid index.")
+                continue
+            item = index.mappings[idx]
+            if opt == "D":
+                index.remove(idx)
+                view = [i for i in view if i != idx]
+                print(f"Deleted {item['command_name']}")
+                continue
+            print(f"Editing {item['command_name']}")
+            new_shortcut = input(f"New Shortcut (current: {item['ms_shortcut']}): ")
+            if new_shortcut:
+                if describe_shortcut(index, new_shortcut, defaults_index, exclude=idx) or \
+                        input("Keep anyway? (y/N): ").upper() == "Y":
+                    index.set_shortcut(idx, new_shortcut)
         elif opt == "A":
             name = input("Command Name: ")
             uno = input("UNO Command (e.g. .uno:Save): ")
             sc = input("Shortcut (e.g. Ctrl+S): ")
-            mappings.append({
+            if not describe_shortcut(index, sc, defaults_index) and \
+                    input("Add anyway? (y/N): ").upper() != "Y":
+                continue
+            idx = index.add({
                 "command_name": name,
                 "uno_command": uno,
                 "ms_shortcut": sc
             })
+            if not filter_term:
+                view.append(idx)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate LibreOffice shortcut config")
     parser.add_argument("--map", help="Path to JSON mapping file")
-    parser.add_argument("--out", help="Output path for .cfg file")
+    parser.add_argument("--out", help="Output path for .cfg file ('-' streams it to stdout, logs go to stderr)")
     parser.add_argument("--interactive", action="store_true", help="Run in interactive mode")
+    parser.add_argument("--oxt", metavar="PATH", help="Bundle all applications into a single .oxt extension")
+    parser.add_argument("--xcd", metavar="PATH", help="Write all applications as a system-wide .xcd registry layer")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not write compiled .keymap files")
+    parser.add_argument("--variants", metavar="DIR", help="Build one .cfg per delta JSON file in DIR (requires --app)")
+    parser.add_argument("--variants-out", metavar="DIR", default="dist/variants", help="Output directory for --variants")
+    parser.add_argument("--app", choices=list(APPS), help="Application for --variants or --layouts, or for --out without --map")
+    parser.add_argument("--layouts", nargs="*", choices=list(LAYOUTS), metavar="LAYOUT",
+                        help=f"Build every application for these keyboard layouts (default: all of {', '.join(LAYOUTS)})")
+    parser.add_argument("--layouts-out", metavar="DIR", default="dist", help="Output directory for --layouts (one subdirectory per layout)")
 
     args = parser.parse_args()
 
+    if args.out and not (args.map or args.app):
+        parser.error("--out requires --map or --app")
+
     if args.interactive:
         interactive_mode()
-    elif args.map and args.out:
-        generate_package(args.map, args.out)
+    elif args.oxt:
+        generate_extension(args.oxt, use_cache=not args.no_cache)
+    elif args.xcd:
+        generate_registry_layer(args.xcd, use_cache=not args.no_cache)
+    elif args.variants:
+        if not args.app:
+            parser.error("--variants requires --app")
+        generate_variants(args.app, args.variants, args.variants_out, use_cache=not args.no_cache)
+    elif args.layouts is not None:
+        generate_layouts(args.layouts, [args.app] if args.app else None, args.layouts_out, use_cache=not args.no_cache)
+    elif args.out and (args.map or args.app):
+        if args.map:
+            json_path, defaults_path = args.map, None
+        else:
+            json_path, defaults_path = APPS[args.app]["mappings"], APPS[args.app]["defaults"]
+
+        if args.out == "-":
+            # Keep stdout clean for the archive; progress messages go to stderr
+            stdout = sys.stdout.buffer
+            with contextlib.redirect_stdout(sys.stderr):
+                write_package(stdout, json_path, defaults_path, use_cache=not args.no_cache)
+        else:
+            generate_package(json_path, args.out, defaults_path, use_cache=not args.no_cache)
     else:
         # Default behavior: generate all
         if not os.path.exists("dist"):
             os.makedirs("dist")
 
-        if os.path.exists("mappings/writer.json"):
-            generate_package("mappings/writer.json", "dist/Word_Shortcuts_for_Writer.cfg", "defaults/writer.json")
-        if os.path.exists("mappings/calc.json"):
-            generate_package("mappings/calc.json", "dist/Excel_Shortcuts_for_Calc.cfg", "defaults/calc.json")
-        if os.path.exists("mappings/impress.json"):
-            generate_package("mappings/impress.json", "dist/PowerPoint_Shortcuts_for_Impress.cfg", "defaults/impress.json")
+        for app in APPS.values():
+            if os.path.exists(app["mappings"]):
+                generate_package(app["mappings"], app["output"], app["defaults"], use_cache=not args.no_cache)
@@ -0,0 +1,212 @@
+import os
+import mmap
+import struct
+import hashlib
+import tempfile
+from array import array
+
+# Compiled keymap format
+# ----------------------
+# header   : magic, format version, source count, item count, code count,
+#            command count, sha256 of the sources (+ salt), sha256 of the salt
+# sources  : (mtime_ns, size) per source file, used as a cheap freshness check
+# strings  : interned code and command tables as offset arrays + utf-8 blobs
+# items    : parallel arrays of command index (I), code index (H), flags (B)
+#
+# All integers are little-endian and sections are 4-byte aligned so the file
+# can be memory-mapped and read without decoding the whole file.
+
+MAGIC = b"LOKM"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sHHIII32s32s")
+SOURCE = struct.Struct("<QQ")
+
+FLAG_SHIFT = 1
+FLAG_MOD1 = 2
+FLAG_MOD2 = 4
+
+def cache_path_for(json_path):
+    """The compiled keymap is stored next to its source, e.g. mappings/writer.keymap"""
+    return os.path.splitext(json_path)[0] + ".keymap"
+
+def source_stats(source_paths):
+    stats = []
+    for path in source_paths:
+        st = os.stat(path)
+        stats.append((st.st_mtime_ns, st.st_size))
+    return stats
+
+def source_digest(source_paths, salt=b""):
+    h = hashlib.sha256()
+    h.update(salt)
+    for path in source_paths:
+        h.update(path.encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            h.update(f.read())
+        h.update(b"\0")
+    return h.digest()
+
+def _aligned(n):
+    return (n + 3) & ~3
+
+def _pack_strings(strings):
+    offsets = array("I", [0])
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    blob += b"\0" * (_aligned(len(blob)) - len(blob))
+    return offsets.tobytes() + bytes(blob)
+
+def write_keymap(path, items, source_paths, salt=b""):
+    """
+    items: list of (code, shift, mod1, mod2, command) tuples as produced by
+    generate_config.compile_mappings.
+    """
+    code_ids = {}
+    command_ids = {}
+    codes = array("H")
+    commands = array("I")
+    flags = array("B")
+
+    for code, shift, mod1, mod2, command in items:
+        codes.append(code_ids.setdefault(code, len(code_ids)))
+        commands.append(command_ids.setdefault(command, len(command_ids)))
+        flags.append((FLAG_SHIFT if shift else 0) | (FLAG_MOD1 if mod1 else 0) | (FLAG_MOD2 if mod2 else 0))
+
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(source_paths), len(items),
+        len(code_ids), len(command_ids), source_digest(source_paths, salt),
+        hashlib.sha256(salt).digest()
+    )
+    sources = b"".join(SOURCE.pack(mtime, size) for mtime, size in source_stats(source_paths))
+
+    # Write to a temporary file first so readers never see a partial keymap;
+    # mkstemp gives concurrent writers their own temporary file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(sources)
+            f.write(_pack_strings(code_ids))
+            f.write(_pack_strings(command_ids))
+            f.write(commands.tobytes())
+            f.write(codes.tobytes())
+            f.write(flags.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class Keymap:
+    """Read-only view over a memory-mapped compiled keymap."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        try:
+            self._parse(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _section(self, offset, size, fmt=None):
+        """Bounds-check a section so a truncated file fails with ValueError."""
+        if offset < 0 or size < 0 or offset + size > len(self._buf):
+            raise ValueError(f"keymap section at {offset} ({size} bytes) runs past the end of the file")
+        view = memoryview(self._buf)[offset:offset + size]
+        self._views.append(view)
+        if fmt:
+            view = view.cast(fmt)
+            self._views.append(view)
+        return view
+
+    def _parse(self, path):
+        magic, version, n_sources, n_items, n_codes, n_commands, digest, salt_digest = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a compiled keymap (version {FORMAT_VERSION})")
+
+        self.digest = digest
+        self.salt_digest = salt_digest
+        offset = HEADER.size
+        self._section(offset, n_sources * SOURCE.size)
+        self.sources = [SOURCE.unpack_from(self._buf, offset + i * SOURCE.size) for i in range(n_sources)]
+        offset += n_sources * SOURCE.size
+
+        self._codes, offset = self._read_strings(offset, n_codes)
+        self._commands, offset = self._read_strings(offset, n_commands)
+
+        self._command_ids = self._section(offset, 4 * n_items, "I")
+        offset += 4 * n_items
+        self._code_ids = self._section(offset, 2 * n_items, "H")
+        offset += 2 * n_items
+        self._flags = self._section(offset, n_items)
+        self._len = n_items
+
+        if n_items and (max(self._command_ids) >= n_commands or max(self._code_ids) >= n_codes):
+            raise ValueError(f"{path} refers to strings it does not contain")
+
+    def _read_strings(self, offset, count):
+        offsets = self._section(offset, 4 * (count + 1), "I")
+        start = offset + 4 * (count + 1)
+        if any(offsets[i] > offsets[i + 1] for i in range(count)):
+            raise ValueError("keymap string offsets are not increasing")
+        blob = self._section(start, _aligned(offsets[count]))
+        strings = [bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8") for i in range(count)]
+        return strings, start + _aligned(offsets[count])
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self._len:
+            raise IndexError(idx)
+        flag = self._flags[idx]
+        return (
+            self._codes[self._code_ids[idx]],
+            bool(flag & FLAG_SHIFT),
+            bool(flag & FLAG_MOD1),
+            bool(flag & FLAG_MOD2),
+            self._commands[self._command_ids[idx]],
+        )
+
+    def __iter__(self):
+        for idx in range(self._len):
+            yield self[idx]
+
+    def close(self):
+        # Casts are released before the views they were made from
+        for view in reversed(self._views):
+            view.release()
+        self._buf.close()
+
+def load_keymap(path, source_paths, salt=b""):
+    """
+    Return the items of a compiled keymap, or None if it is missing or stale.
+    Sources whose mtime and size are unchanged are trusted without hashing.
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        keymap = Keymap(path)
+    except (OSError, ValueError, TypeError, struct.error):
+        # Missing, truncated or corrupt: the caller rebuilds it
+        return None
+
+    try:
+        if len(keymap.sources) != len(source_paths):
+            return None
+        if keymap.salt_digest != hashlib.sha256(salt).digest():
+            return None
+        if keymap.sources != source_stats(source_paths):
+            # Touched but maybe not modified: fall back to the content hash
+            if keymap.digest != source_digest(source_paths, salt):
+                return None
+        return list(keymap)
+    finally:
+        keymap.close()
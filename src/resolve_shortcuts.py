@@ -0,0 +1,125 @@
+import sys
+import time
+import zipfile
+import argparse
+import functools
+import xml.etree.ElementTree as ET
+
+from generate_config import APPS, load_items, chord_of
+
+ACCEL_NS = "{http://openoffice.org/2001/accel}"
+XLINK_NS = "{http://www.w3.org/1999/xlink}"
+
+def read_cfg_items(cfg_path):
+    """Accelerator items (code, shift, mod1, mod2, command) stored in a .cfg archive."""
+    with zipfile.ZipFile(cfg_path, 'r') as zf:
+        root = ET.fromstring(zf.read("Configurations2/accelerator/current.xml"))
+
+    items = []
+    for item in root.iter(f"{ACCEL_NS}item"):
+        items.append((
+            item.get(f"{ACCEL_NS}code"),
+            item.get(f"{ACCEL_NS}shift") == "true",
+            item.get(f"{ACCEL_NS}mod1") == "true",
+            item.get(f"{ACCEL_NS}mod2") == "true",
+            item.get(f"{XLINK_NS}href"),
+        ))
+    return items
+
+# Keystroke strings are parsed once; replayed scripts repeat the same chords
+parse_keystroke = functools.lru_cache(maxsize=4096)(chord_of)
+
+class ChordTable:
+    """Hashed (code, shift, mod1, mod2) -> command table."""
+
+    def __init__(self, items):
+        self.table = {}
+        for code, shift, mod1, mod2, command in items:
+            # Later items win, as custom mappings are appended after defaults
+            self.table[(code, shift, mod1, mod2)] = command
+
+    def __len__(self):
+        return len(self.table)
+
+    def lookup(self, chord):
+        return self.table.get(chord)
+
+    def resolve(self, keystroke):
+        """Command bound to a keystroke string such as "Ctrl+Shift+D", or None."""
+        chord = parse_keystroke(keystroke)
+        if chord is None:
+            return None
+        return self.table.get(chord)
+
+    def replay(self, lines):
+        """
+        Replay a keystroke script against the table.
+        Each line is a keystroke, optionally followed by " = .uno:Command" as the
+        expected binding (" = none" expects it to be unbound). The separator is
+        the last " = ", so "Ctrl+= = .uno:SubScript" works. Returns
+        (results, failures) where results are (keystroke, command) pairs.
+        """
+        results = []
+        failures = []
+        for line_no, line in enumerate(lines, 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            keystroke, _, expected = line.rpartition(" = ") if " = " in line else (line, "", "")
+            keystroke = keystroke.strip()
+            command = self.resolve(keystroke)
+            results.append((keystroke, command))
+            if expected:
+                expected = expected.strip()
+                wanted = None if expected.lower() == "none" else expected
+                if command != wanted:
+                    failures.append(f"line {line_no}: {keystroke} resolved to {command}, expected {wanted}")
+        return results, failures
+
+def benchmark(table, keystrokes, count):
+    """Resolve `count` lookups cycling over keystrokes; returns lookups per second."""
+    chords = [parse_keystroke(k) for k in keystrokes]
+    lookup = table.table.get
+    n = len(chords)
+    start = time.perf_counter()
+    for i in range(count):
+        lookup(chords[i % n])
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed else float("inf")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve keystrokes against accelerators without running LibreOffice")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--app", choices=list(APPS), help="Use the merged mappings of an application")
+    source.add_argument("--cfg", help="Use a generated .cfg archive")
+    parser.add_argument("--script", help="Keystroke script to replay (one keystroke per line, optional ' = .uno:Cmd')")
+    parser.add_argument("--bench", type=int, metavar="N", help="Measure N lookups and report the rate")
+    parser.add_argument("keystrokes", nargs="*", help="Keystrokes to resolve, e.g. Ctrl+Shift+D")
+    args = parser.parse_args()
+
+    if args.cfg:
+        items = read_cfg_items(args.cfg)
+    else:
+        app = APPS[args.app]
+        items = load_items(app["mappings"], app["defaults"])
+    table = ChordTable(items)
+
+    for keystroke in args.keystrokes:
+        print(f"{keystroke} -> {table.resolve(keystroke)}")
+
+    failed = False
+    if args.script:
+        with open(args.script, 'r') as f:
+            results, failures = table.replay(f)
+        print(f"Replayed {len(results)} keystrokes from {args.script}")
+        for failure in failures:
+            print(f"  - {failure}")
+        failed = bool(failures)
+
+    if args.bench:
+        keystrokes = args.keystrokes or ["Ctrl+Shift+D", "Ctrl+C", "F5", "Alt+F4", "Ctrl+Shift+F12"]
+        rate = benchmark(table, keystrokes, args.bench)
+        print(f"{args.bench} lookups: {rate:,.0f} lookups/s")
+
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,186 @@
+import os
+import ast
+import sys
+import glob
+import json
+import hashlib
+import argparse
+import subprocess
+
+from generate_config import APPS, load_items, chord_of, accelerator_node_name
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STATE_PATH = ".gui_test_state.json"
+
+# Shared harness code; a change here invalidates every GUI test
+HARNESS_FILES = ["test_utils.py"]
+
+def read_declaration(script_path):
+    """GUI_TEST dict of a verifier, read with ast so pyautogui is not imported."""
+    with open(script_path, 'r') as f:
+        tree = ast.parse(f.read(), script_path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "GUI_TEST" for t in node.targets):
+            return ast.literal_eval(node.value)
+    return None
+
+def discover_tests():
+    tests = {}
+    for path in sorted(glob.glob(os.path.join(SRC_DIR, "verify_*_gui.py"))):
+        declaration = read_declaration(path)
+        if declaration is not None:
+            tests[os.path.basename(path)] = declaration
+    return tests
+
+def sha256_files(paths):
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def app_bindings(app_key):
+    """Merged accelerator table of an application as chord name -> command."""
+    app = APPS[app_key]
+    bindings = {}
+    for code, shift, mod1, mod2, command in load_items(app["mappings"], app["defaults"]):
+        bindings[accelerator_node_name(code, shift, mod1, mod2)] = command
+    return bindings
+
+def fingerprint(script, declaration, bindings):
+    """
+    What a test depends on: its own source, the harness, and the command bound
+    to each exercised chord (or the whole merged map for "*").
+    """
+    result = {
+        "script": sha256_files([os.path.join(SRC_DIR, script)] + [os.path.join(SRC_DIR, f) for f in HARNESS_FILES]),
+        "apps": {},
+    }
+    for app_key in declaration["apps"]:
+        table = bindings[app_key]
+        if declaration["shortcuts"] == "*":
+            chords = table
+        else:
+            chords = {}
+            for shortcut in declaration["shortcuts"]:
+                chord = chord_of(shortcut)
+                name = accelerator_node_name(*chord) if chord else shortcut
+                chords[name] = table.get(name)
+        result["apps"][app_key] = chords
+    return result
+
+def compare(old, new, bindings_changed):
+    """Return (run, reason) for a test given its recorded and current fingerprints."""
+    if old is None:
+        return True, "no green run recorded"
+    if old["script"] != new["script"]:
+        return True, "test or harness source changed"
+
+    changed = []
+    for app_key, chords in new["apps"].items():
+        old_chords = old["apps"].get(app_key, {})
+        for name in sorted(set(chords) | set(old_chords)):
+            if chords.get(name) != old_chords.get(name):
+                changed.append(f"{app_key}:{name}")
+    if changed:
+        return True, "exercised chords changed: " + ", ".join(changed)
+
+    apps = list(new["apps"])
+    changed_apps = [a for a in apps if bindings_changed.get(a)]
+    if changed_apps:
+        return False, f"{', '.join(changed_apps)} mappings changed, but none of the chords this test exercises"
+    return False, f"{', '.join(apps)} mappings unchanged since last green run"
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {"tests": {}, "apps": {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_state(path, state):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_path, path)
+
+def resource_summary(path):
+    """Latest and worst recorded resource usage per (test, config), from test_utils' resources.jsonl."""
+    runs = {}
+    with open(path, 'r') as f:
+        for line in f:
+            record = json.loads(line)
+            runs.setdefault((record["test"], record["config"]), []).append(record)
+
+    print(f"\n{'Test':<24} {'Config':<16} {'Runs':>4} {'CPU s':>7} {'Startup s':>9} {'RSS MB':>8} {'Threads':>7}")
+    for (test, config), records in sorted(runs.items()):
+        worst = {key: max(r[key] for r in records)
+                 for key in ("cpu_seconds", "startup_cpu_seconds", "peak_rss_mb", "peak_threads")}
+        print(f"{test:<24} {config:<16} {len(records):>4} {worst['cpu_seconds']:>7} "
+              f"{worst['startup_cpu_seconds']:>9} {worst['peak_rss_mb']:>8} {worst['peak_threads']:>7}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run only the GUI tests affected by mapping changes")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help=f"State file (default: {DEFAULT_STATE_PATH})")
+    parser.add_argument("--dry-run", action="store_true", help="Print the selection without running tests")
+    parser.add_argument("--all", action="store_true", help="Run every GUI test regardless of changes")
+    parser.add_argument("--record", action="store_true", help="Record the current state as green without running tests")
+    parser.add_argument("--resources", action="store_true", help="Print the recorded soffice resource usage per test and config")
+    args = parser.parse_args()
+
+    if args.resources:
+        path = os.path.join(os.environ.get("GUI_TRACE_DIR", "traces"), "resources.jsonl")
+        if not os.path.exists(path):
+            print(f"No resource reports in {path} yet.")
+            sys.exit(1)
+        resource_summary(path)
+        sys.exit(0)
+
+    tests = discover_tests()
+    bindings = {app_key: app_bindings(app_key) for app_key in APPS if os.path.exists(APPS[app_key]["mappings"])}
+    state = load_state(args.state)
+
+    app_hashes = {a: hashlib.sha256(json.dumps(t, sort_keys=True).encode("utf-8")).hexdigest() for a, t in bindings.items()}
+    bindings_changed = {a: state["apps"].get(a) != h for a, h in app_hashes.items()}
+
+    selected = []
+    print("\nGUI test selection:")
+    for script, declaration in tests.items():
+        current = fingerprint(script, declaration, bindings)
+        run, reason = compare(state["tests"].get(script), current, bindings_changed)
+        if args.all:
+            run, reason = True, "--all"
+        if run:
+            selected.append((script, current))
+            print(f"  RUN:  {script} ({reason})")
+        else:
+            print(f"  SKIP: {script} ({reason})")
+
+    if args.record:
+        for script, declaration in tests.items():
+            state["tests"][script] = fingerprint(script, declaration, bindings)
+        state["apps"] = app_hashes
+        save_state(args.state, state)
+        print(f"Recorded {len(tests)} tests as green in {args.state}")
+        sys.exit(0)
+
+    if args.dry_run:
+        sys.exit(0)
+
+    failed = []
+    for script, current in selected:
+        print(f"\nRunning {script}...")
+        result = subprocess.run([sys.executable, os.path.join(SRC_DIR, script)])
+        if result.returncode == 0:
+            state["tests"][script] = current
+        else:
+            failed.append(script)
+
+    # Only a fully green run moves the application baseline forward
+    if not failed:
+        state["apps"] = app_hashes
+    save_state(args.state, state)
+
+    if failed:
+        print(f"FAILED: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"\nAll {len(selected)} selected GUI tests passed ({len(tests) - len(selected)} skipped).")
@@ -3,6 +3,13 @@ import sys
 import time
 import subprocess
 import shutil
+import json
+import atexit
+import threading
+import contextlib
+
+UNO_PORT = 2002
+UNO_ACCEPT = f"socket,host=localhost,port={UNO_PORT};urp;StarOffice.ComponentContext"
 
 # Check for required libraries inside function to allow import after install prompt
 def check_deps():
@@ -23,6 +30,262 @@ def get_executable():
         sys.exit(1)
     return executable
 
+class Timeline:
+    """
+    Records harness actions as Chrome trace "complete" events (ph "X").
+    Load the exported JSON in chrome://tracing or https://ui.perfetto.dev.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.events = []
+        self.export_registered = False
+
+    @contextlib.contextmanager
+    def span(self, name, cat, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.events.append({
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    def counter(self, name, **values):
+        self.events.append({
+            "name": name,
+            "ph": "C",
+            "ts": (time.perf_counter() - self.origin) * 1e6,
+            "pid": os.getpid(),
+            "args": values,
+        })
+
+    def summary(self):
+        """Total seconds per category, e.g. how much of the run was sleep padding."""
+        totals = {}
+        for event in self.events:
+            if event["ph"] != "X":
+                continue
+            totals[event["cat"]] = totals.get(event["cat"], 0) + event["dur"] / 1e6
+        return totals
+
+    def export(self, path):
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+TIMELINE = Timeline()
+
+def test_name():
+    return os.path.splitext(os.path.basename(sys.argv[0]))[0]
+
+def export_trace(name):
+    """Write the run's timeline to $GUI_TRACE_DIR (default: traces/) and print where time went."""
+    if not TIMELINE.events:
+        return
+    trace_dir = os.environ.get("GUI_TRACE_DIR", "traces")
+    if not os.path.exists(trace_dir):
+        os.makedirs(trace_dir)
+    path = os.path.join(trace_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    TIMELINE.export(path)
+    totals = ", ".join(f"{cat} {secs:.1f}s" for cat, secs in sorted(TIMELINE.summary().items()))
+    print(f"Timeline written to {path} ({totals})")
+
+# Resource limits for the managed soffice process tree; unset means no limit
+RESOURCE_LIMITS = {
+    "cpu_seconds": "GUI_MAX_CPU_SECONDS",
+    "startup_cpu_seconds": "GUI_MAX_STARTUP_CPU_SECONDS",
+    "peak_rss_mb": "GUI_MAX_RSS_MB",
+    "peak_threads": "GUI_MAX_THREADS",
+}
+
+def read_proc_stat(pid):
+    """(ppid, cpu seconds) from /proc/<pid>/stat, or None if the process is gone."""
+    try:
+        with open(f"/proc/{pid}/stat", 'r') as f:
+            data = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces; fields resume after the closing parenthesis
+    fields = data[data.rindex(")") + 2:].split()
+    ppid = int(fields[1])
+    utime, stime = int(fields[11]), int(fields[12])
+    return ppid, (utime + stime) / os.sysconf("SC_CLK_TCK")
+
+def read_proc_status(pid):
+    """(rss MB, threads) from /proc/<pid>/status, or None if the process is gone."""
+    rss_kb = threads = 0
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+                elif line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+    except OSError:
+        return None
+    return rss_kb / 1024, threads
+
+class ResourceMonitor:
+    """
+    Samples CPU time, RSS and thread count of a process and its descendants
+    (the soffice launcher forks soffice.bin) from /proc on a background thread.
+    """
+
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu = {}
+        self.samples = []
+        self.marks = {}
+        self.peak_rss_mb = 0
+        self.peak_threads = 0
+        # mark() samples on the caller's thread while _run samples in the background
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def tree(self):
+        parents = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                stat = read_proc_stat(int(name))
+                if stat is not None:
+                    parents.setdefault(stat[0], []).append(int(name))
+        pids = [self.pid]
+        for pid in pids:
+            pids.extend(parents.get(pid, []))
+        return pids
+
+    def sample(self):
+        rss_mb = threads = 0
+        with self._lock:
+            for pid in self.tree():
+                stat = read_proc_stat(pid)
+                status = read_proc_status(pid)
+                if stat is None or status is None:
+                    continue
+                # Keep the last reading of exited processes so CPU time only grows
+                self.cpu[pid] = max(self.cpu.get(pid, 0), stat[1])
+                rss_mb += status[0]
+                threads += status[1]
+            cpu = sum(self.cpu.values())
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+            self.peak_threads = max(self.peak_threads, threads)
+            self.samples.append((time.time(), cpu, rss_mb, threads))
+        TIMELINE.counter("soffice", cpu_seconds=cpu, rss_mb=rss_mb, threads=threads)
+
+    def cpu_seconds(self):
+        with self._lock:
+            return sum(self.cpu.values())
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+
+    def mark(self, name):
+        """Remember the CPU time used so far, e.g. at the end of startup."""
+        self.sample()
+        self.marks[name] = self.cpu_seconds()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self):
+        return {
+            "cpu_seconds": round(self.cpu_seconds(), 2),
+            "startup_cpu_seconds": round(self.marks.get("startup", 0), 2),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "peak_threads": self.peak_threads,
+            "samples": len(self.samples),
+        }
+
+def start_monitor(proc):
+    if not os.path.isdir(f"/proc/{proc.pid}"):
+        print("Resource monitoring needs /proc; skipping it on this platform.")
+        return None
+    monitor = ResourceMonitor(proc.pid, float(os.environ.get("GUI_SAMPLE_INTERVAL", "0.5")))
+    monitor.start()
+    # Crashed or failing runs are recorded too; finish_monitor does nothing if already called
+    atexit.register(finish_monitor, proc)
+    return monitor
+
+def finish_monitor(proc):
+    """
+    Stop the sampler attached by launch_app, append the report to
+    <trace dir>/resources.jsonl and fail the run if a limit is exceeded.
+    """
+    monitor = getattr(proc, "monitor", None)
+    if monitor is None:
+        return
+    monitor.stop()
+    proc.monitor = None
+
+    report = monitor.report()
+    record = {
+        "test": test_name(),
+        "config": os.environ.get("LO_SHORTCUTS_CONFIG", "default"),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **report,
+    }
+    print(f"Resources ({record['config']}): CPU {report['cpu_seconds']}s "
+          f"(startup {report['startup_cpu_seconds']}s), peak RSS {report['peak_rss_mb']} MB, "
+          f"peak threads {report['peak_threads']}")
+
+    trace_dir = os.environ.get("GUI_TRACE_DIR", "traces")
+    if not os.path.exists(trace_dir):
+        os.makedirs(trace_dir)
+    with open(os.path.join(trace_dir, "resources.jsonl"), 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+    exceeded = []
+    for key, env in RESOURCE_LIMITS.items():
+        limit = os.environ.get(env)
+        if limit and report[key] > float(limit):
+            exceeded.append(f"{key} {report[key]} > {env}={limit}")
+    if exceeded:
+        print("FAILED: Resource limits exceeded:")
+        for e in exceeded:
+            print(f"  - {e}")
+        sys.exit(1)
+
+# Instrumented input actions; verifiers use these instead of pyautogui/time directly
+def press(key):
+    import pyautogui
+    with TIMELINE.span(f"press {key}", "key", key=key):
+        pyautogui.press(key)
+
+def hotkey(*keys):
+    import pyautogui
+    with TIMELINE.span(f"hotkey {'+'.join(keys)}", "key", keys=list(keys)):
+        pyautogui.hotkey(*keys)
+
+def write(text, interval=0.1):
+    import pyautogui
+    with TIMELINE.span(f"write {text!r}", "write", text=text, interval=interval):
+        pyautogui.write(text, interval=interval)
+
+def click(x, y):
+    import pyautogui
+    with TIMELINE.span("click", "mouse", x=x, y=y):
+        pyautogui.click(x, y)
+
+def sleep(seconds, reason=""):
+    with TIMELINE.span(f"sleep {seconds}s", "sleep", seconds=seconds, reason=reason):
+        time.sleep(seconds)
+
 def launch_app(app_type):
     """
     app_type: 'writer', 'calc', or 'impress'
@@ -30,49 +293,185 @@ def launch_app(app_type):
     check_deps()
     import pyautogui
 
+    # Export the timeline however the verifier exits, including sys.exit on failure.
+    # One process may launch several apps (verify_probes_gui), but shares one timeline.
+    if not TIMELINE.export_registered:
+        atexit.register(export_trace, test_name())
+        TIMELINE.export_registered = True
+
     print(f"\nLaunching LibreOffice {app_type.capitalize()}...")
     executable = get_executable()
 
-    args = [executable, f"--{app_type}", "--nologo", "--nodefault"]
-    proc = subprocess.Popen(args)
+    with TIMELINE.span("launch", "lifecycle", app=app_type):
+        # The UNO socket lets the harness query the live document (see connect_document)
+        args = [executable, f"--{app_type}", "--nologo", "--nodefault", f"--accept={UNO_ACCEPT}"]
+        proc = subprocess.Popen(args)
+        proc.monitor = start_monitor(proc)
 
-    # Wait for load
-    print("Waiting 10 seconds for LibreOffice to load...")
-    time.sleep(10)
+        # Wait for load
+        print("Waiting 10 seconds for LibreOffice to load...")
+        sleep(10, "wait for LibreOffice to load")
 
-    # Focus
-    screen_width, screen_height = pyautogui.size()
-    pyautogui.click(screen_width // 2, screen_height // 2)
-    time.sleep(1)
+        # Focus
+        screen_width, screen_height = pyautogui.size()
+        click(screen_width // 2, screen_height // 2)
+        sleep(1, "focus")
 
+    if proc.monitor:
+        proc.monitor.mark("startup")
     return proc
 
 def save_and_close(output_file, proc):
-    import pyautogui
-
     print(f"Saving to {output_file}...")
     if os.path.exists(output_file):
         os.remove(output_file)
 
-    pyautogui.hotkey('ctrl', 's')
-    time.sleep(2)
-    pyautogui.write(output_file, interval=0.1)
-    time.sleep(1)
-    pyautogui.press('enter')
-    time.sleep(3)
-    # Confirm overwrite if needed
-    pyautogui.press('enter')
-    time.sleep(1)
+    with TIMELINE.span("save", "lifecycle", path=output_file):
+        hotkey('ctrl', 's')
+        sleep(2, "wait for save dialog")
+        write(output_file, interval=0.1)
+        sleep(1)
+        press('enter')
+        sleep(3, "wait for keep-format dialog")
+        # Confirm overwrite if needed
+        press('enter')
+        sleep(1)
 
     print("Closing LibreOffice...")
-    pyautogui.hotkey('ctrl', 'q')
-    time.sleep(2)
+    with TIMELINE.span("quit", "lifecycle"):
+        hotkey('ctrl', 'q')
+        sleep(2, "wait for exit")
 
-    if proc.poll() is None:
-        proc.terminate()
+        if proc.poll() is None:
+            proc.terminate()
+    finish_monitor(proc)
 
     if not os.path.exists(output_file):
         print(f"FAILED: Output file {output_file} was not created.")
         sys.exit(1)
 
     print(f"File {output_file} created successfully.")
+
+class DocumentProbe:
+    """Read-only queries against the live document model over UNO."""
+
+    def __init__(self, desktop, doc):
+        self.desktop = desktop
+        self.doc = doc
+
+    # Writer
+    def _paragraphs(self):
+        result = []
+        enum = self.doc.getText().createEnumeration()
+        while enum.hasMoreElements():
+            para = enum.nextElement()
+            if para.supportsService("com.sun.star.text.Paragraph"):
+                result.append(para)
+        return result
+
+    def paragraphs(self):
+        return [para.getString() for para in self._paragraphs()]
+
+    def paragraph(self, index):
+        paras = self._paragraphs()
+        return paras[index].getString() if index < len(paras) else None
+
+    def paragraph_style(self, index):
+        paras = self._paragraphs()
+        return paras[index].ParaStyleName if index < len(paras) else None
+
+    # Calc
+    def sheet_count(self):
+        return self.doc.getSheets().getCount()
+
+    def cell(self, name, sheet=None):
+        """Cell text by name ("B3"); defaults to the active sheet."""
+        if sheet is None:
+            target = self.doc.getCurrentController().getActiveSheet()
+        else:
+            target = self.doc.getSheets().getByIndex(sheet)
+        return target.getCellRangeByName(name).getString()
+
+    # Impress
+    def slide_count(self):
+        return self.doc.getDrawPages().getCount()
+
+    def slide_text(self, index):
+        page = self.doc.getDrawPages().getByIndex(index)
+        texts = []
+        for i in range(page.getCount()):
+            shape = page.getByIndex(i)
+            if hasattr(shape, "getString"):
+                texts.append(shape.getString())
+        return "".join(texts)
+
+    def close(self, proc):
+        """Discard the document and quit without a save dialog."""
+        print("Closing LibreOffice...")
+        with TIMELINE.span("quit", "lifecycle", via="uno"):
+            try:
+                self.doc.setModified(False)
+                self.desktop.terminate()
+            except Exception:
+                pass
+            sleep(2, "wait for exit")
+            if proc.poll() is None:
+                proc.terminate()
+        finish_monitor(proc)
+
+def connect_document(timeout=20):
+    """
+    Connect to the LibreOffice started by launch_app and return a DocumentProbe
+    for its current document, or None if the uno module is not available.
+    """
+    try:
+        import uno
+    except ImportError:
+        print("Python UNO bridge not available, falling back to save-and-reload verification.")
+        return None
+
+    with TIMELINE.span("uno connect", "uno"):
+        return _connect(uno, timeout)
+
+def _connect(uno, timeout):
+    local_ctx = uno.getComponentContext()
+    resolver = local_ctx.ServiceManager.createInstanceWithContext(
+        "com.sun.star.bridge.UnoUrlResolver", local_ctx)
+
+    deadline = time.time() + timeout
+    while True:
+        try:
+            ctx = resolver.resolve(f"uno:{UNO_ACCEPT}")
+            desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+            doc = desktop.getCurrentComponent()
+            if doc is not None:
+                return DocumentProbe(desktop, doc)
+        except Exception:
+            pass
+        if time.time() > deadline:
+            print("Could not connect to LibreOffice over UNO, falling back to save-and-reload verification.")
+            return None
+        time.sleep(1)
+
+def expect_step(proc, description, getter, expected, timeout=3):
+    """
+    Assert a document property right after a step, failing fast.
+    getter is polled until it returns expected or the timeout expires, since
+    LibreOffice processes the simulated keystrokes asynchronously.
+    """
+    with TIMELINE.span(f"expect {description}", "assert", expected=repr(expected)):
+        deadline = time.time() + timeout
+        while True:
+            actual = getter()
+            if actual == expected:
+                print(f"  OK: {description}")
+                return
+            if time.time() > deadline:
+                break
+            time.sleep(0.2)
+
+    print(f"FAILURE: {description}: expected {expected!r}, got {actual!r}")
+    if proc.poll() is None:
+        proc.terminate()
+    finish_monitor(proc)
+    sys.exit(1)
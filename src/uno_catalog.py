@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import difflib
+import argparse
+import xml.etree.ElementTree as ET
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "catalog", "uno_commands.json")
+
+# LibreOffice command description files and the catalog module they feed
+COMMAND_FILES = {
+    "GenericCommands": "common",
+    "WriterCommands": "swriter",
+    "CalcCommands": "scalc",
+    "DrawImpressCommands": "simpress",
+}
+
+OOR_NS = "{http://openoffice.org/2001/registry}"
+
+PREFIX_LEN = 2
+
+def command_name(command):
+    """'.uno:StyleApply?Style:string=Heading 1' -> 'StyleApply'"""
+    if command.startswith(".uno:"):
+        command = command[len(".uno:"):]
+    return command.split("?", 1)[0]
+
+class CommandCatalog:
+    """
+    Per-module sets of valid UNO command names.
+    Names are kept sorted and bucketed by their first letters, so near-match
+    suggestions only compare against commands sharing a prefix.
+    """
+
+    def __init__(self, version, modules):
+        self.version = version
+        self.modules = {module: frozenset(names) for module, names in modules.items()}
+        self.sorted = {module: sorted(names) for module, names in self.modules.items()}
+        self._allowed = {}
+        self.prefixes = {}
+        for module, names in self.sorted.items():
+            buckets = {}
+            for name in names:
+                buckets.setdefault(name[:PREFIX_LEN].lower(), []).append(name)
+            self.prefixes[module] = buckets
+
+    def _scopes(self, module):
+        if module is None:
+            return list(self.modules)
+        return ["common", module] if module != "common" else ["common"]
+
+    def allowed(self, module=None):
+        """Set of valid names, with and without the .uno: prefix, for a module scope."""
+        if module not in self._allowed:
+            names = frozenset().union(*(self.modules.get(scope, frozenset()) for scope in self._scopes(module)))
+            self._allowed[module] = names | frozenset(f".uno:{name}" for name in names)
+        return self._allowed[module]
+
+    def is_valid(self, command, module=None):
+        """module is a catalog module (swriter/scalc/simpress); None accepts any module."""
+        allowed = self.allowed(module)
+        return command in allowed or command_name(command) in allowed
+
+    def invalid_commands(self, commands, module=None):
+        """Unknown commands among `commands`, in input order and without repeats."""
+        allowed = self.allowed(module)
+        unknown = []
+        seen = set()
+        for command in commands:
+            # Plain commands hit the set directly; only parameterized or unknown ones are parsed
+            if command in allowed:
+                continue
+            if command_name(command) not in allowed and command not in seen:
+                seen.add(command)
+                unknown.append(command)
+        return unknown
+
+    def suggest(self, command, module=None, n=3):
+        """Closest valid commands for an unknown one, as '.uno:Name' strings."""
+        name = command_name(command)
+        candidates = []
+        for scope in self._scopes(module):
+            candidates.extend(self.prefixes.get(scope, {}).get(name[:PREFIX_LEN].lower(), []))
+        matches = difflib.get_close_matches(name, candidates, n=n, cutoff=0.6)
+        if not matches:
+            everything = [c for scope in self._scopes(module) for c in self.sorted.get(scope, [])]
+            matches = difflib.get_close_matches(name, everything, n=n, cutoff=0.75)
+        return [f".uno:{m}" for m in matches]
+
+_catalogs = {}
+
+def load_catalog(path=DEFAULT_CATALOG_PATH):
+    """Load (and memoize) a catalog file; returns None if it does not exist."""
+    path = os.path.abspath(path)
+    if path not in _catalogs:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            data = json.load(f)
+        _catalogs[path] = CommandCatalog(data["version"], data["modules"])
+    return _catalogs[path]
+
+def read_command_files(paths):
+    """
+    Collect command names from LibreOffice's *Commands.xcu files, or from a
+    main.xcd that embeds them, into a catalog module -> names dict.
+    """
+    modules = {module: set() for module in COMMAND_FILES.values()}
+    for path in paths:
+        root = ET.parse(path).getroot()
+        if root.get(f"{OOR_NS}name") in COMMAND_FILES:
+            components = [root]
+        else:
+            components = [c for c in root.iter(f"{OOR_NS}component-data") if c.get(f"{OOR_NS}name") in COMMAND_FILES]
+        for component in components:
+            module = COMMAND_FILES[component.get(f"{OOR_NS}name")]
+            for node in component.iter("node"):
+                name = node.get(f"{OOR_NS}name", "")
+                if name.startswith(".uno:"):
+                    modules[module].add(command_name(name))
+    return modules
+
+def write_catalog(path, version, modules):
+    data = {"version": version, "modules": {m: sorted(names) for m, names in modules.items()}}
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.write("\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query or rebuild the UNO command catalog")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG_PATH, help="Catalog file")
+    parser.add_argument("--module", choices=["swriter", "scalc", "simpress"], help="Restrict checks to one module")
+    parser.add_argument("--build-from", nargs="+", metavar="FILE",
+                        help="Rebuild the catalog from LibreOffice *Commands.xcu files or main.xcd")
+    parser.add_argument("--version", dest="catalog_version", help="Version label for --build-from")
+    parser.add_argument("commands", nargs="*", help="Commands to check, e.g. .uno:GoToEndOfData")
+    args = parser.parse_args()
+
+    if args.build_from:
+        if not args.catalog_version:
+            parser.error("--build-from requires --version")
+        modules = read_command_files(args.build_from)
+        write_catalog(args.catalog, args.catalog_version, modules)
+        print(f"Wrote {sum(len(v) for v in modules.values())} commands to {args.catalog}")
+        sys.exit(0)
+
+    catalog = load_catalog(args.catalog)
+    if catalog is None:
+        print(f"Catalog {args.catalog} not found.")
+        sys.exit(1)
+
+    failed = False
+    for command in args.commands:
+        if catalog.is_valid(command, args.module):
+            print(f"OK: {command}")
+        else:
+            failed = True
+            hint = ", ".join(catalog.suggest(command, args.module)) or "no close match"
+            print(f"UNKNOWN: {command} (did you mean: {hint})")
+
+    if failed:
+        sys.exit(1)
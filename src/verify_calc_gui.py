@@ -1,64 +1,85 @@
-from test_utils import launch_app, save_and_close
-import pyautogui
-import time
+from test_utils import launch_app, save_and_close, connect_document, expect_step, press, hotkey, write, sleep
 import os
 import sys
 from odf import table, teletype
 from odf.opendocument import load
 
+# Read by select_gui_tests.py to decide when this test needs to run again
+GUI_TEST = {
+    "apps": ["calc"],
+    "shortcuts": [
+        "Right", "Enter", "Home", "Up", "Shift+Down", "Ctrl+D", "Shift+F11",
+        "Ctrl+S", "Ctrl+Q"
+    ],
+}
+
 def verify_calc_gui():
     print("Starting Calc GUI Verification...")
     proc = launch_app("calc")
+    probe = connect_document()
 
     # 1. Navigation & Data Entry
     print("Test: Data Entry & Arrows")
     # A1
-    pyautogui.write("ValA1", interval=0.1)
-    pyautogui.press('right')
-    time.sleep(0.5)
+    write("ValA1", interval=0.1)
+    press('right')
+    sleep(0.5)
     # B1
-    pyautogui.write("ValB1", interval=0.1)
-    pyautogui.press('enter')
+    write("ValB1", interval=0.1)
+    press('enter')
     # Usually moves down to B2? Or A2? Depends on settings.
     # Default Calc: Down. So now at B2.
-    time.sleep(0.5)
+    sleep(0.5)
+    if probe:
+        expect_step(proc, "A1 entry", lambda: probe.cell("A1"), "ValA1")
+        expect_step(proc, "Right arrow to B1", lambda: probe.cell("B1"), "ValB1")
 
     # 2. Home Key
     print("Test: Home Key")
-    pyautogui.press('home') # Should go to A2
-    time.sleep(0.5)
-    pyautogui.write("ValA2", interval=0.1)
-    pyautogui.press('right') # B2
-    time.sleep(0.5)
+    press('home') # Should go to A2
+    sleep(0.5)
+    write("ValA2", interval=0.1)
+    press('right') # B2
+    sleep(0.5)
+    if probe:
+        expect_step(proc, "Home to A2", lambda: probe.cell("A2"), "ValA2")
 
     # 3. Fill Down (Ctrl+D)
     print("Test: Fill Down (Ctrl+D)")
     # At B2. Type "FillSource".
-    pyautogui.write("FillSource", interval=0.1)
-    pyautogui.press('enter') # B3
-    time.sleep(0.5)
-    pyautogui.press('up') # Back to B2
-    time.sleep(0.5)
+    write("FillSource", interval=0.1)
+    press('enter') # B3
+    sleep(0.5)
+    press('up') # Back to B2
+    sleep(0.5)
     # Select B2:B3. Shift+Down
-    pyautogui.hotkey('shift', 'down')
-    time.sleep(0.5)
+    hotkey('shift', 'down')
+    sleep(0.5)
     # Ctrl+D
-    pyautogui.hotkey('ctrl', 'd')
-    time.sleep(0.5)
+    hotkey('ctrl', 'd')
+    sleep(0.5)
+    if probe:
+        expect_step(proc, "Fill Down into B3", lambda: probe.cell("B3"), "FillSource")
 
     # 4. New Sheet (Shift+F11)
     print("Test: New Sheet (Shift+F11)")
-    pyautogui.hotkey('shift', 'f11')
-    time.sleep(1)
+    hotkey('shift', 'f11')
+    sleep(1)
 
     # Handle potential "Insert Sheet" dialog (Calc sometimes asks for name/position)
     # Pressing Enter confirms default (which is usually OK)
-    pyautogui.press('enter')
-    time.sleep(1)
+    press('enter')
+    sleep(1)
 
     # Should be on Sheet 2 (or new sheet)
-    pyautogui.write("Sheet2Data", interval=0.1)
-    pyautogui.press('enter')
+    write("Sheet2Data", interval=0.1)
+    press('enter')
+    if probe:
+        expect_step(proc, "New Sheet", lambda: probe.sheet_count() >= 2, True)
+        expect_step(proc, "Data on new sheet", lambda: probe.cell("A1"), "Sheet2Data")
+        probe.close(proc)
+        print("SUCCESS: Calc Verification Passed.")
+        return
 
     output_file = os.path.abspath("test_calc.ods")
     save_and_close(output_file, proc)
@@ -3,37 +3,121 @@ import zipfile
 import xml.etree.ElementTree as ET
 import glob
 import sys
+import json
+import time
+import hashlib
+import argparse
 
-def verify_cfg(cfg_path):
+import uno_catalog
+from generate_config import APPS, BLOCKED_SHORTCUTS, chord_of
+
+# Bump whenever verify_cfg gains or changes checks, so cached results are not reused
+RULESET_VERSION = "4"
+
+DEFAULT_CACHE_PATH = ".verify_cache.json"
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rules")
+
+ACCEL_NS = "{http://openoffice.org/2001/accel}"
+XLINK_NS = "{http://www.w3.org/1999/xlink}"
+
+def app_for(cfg_path):
+    """Application of a generated archive, judged by its file name."""
+    name = os.path.basename(cfg_path)
+    for app_key, app in APPS.items():
+        if name == os.path.basename(app["output"]):
+            return app_key
+    return None
+
+class RuleSet:
+    """
+    A rules/<app>.json file compiled into lookup tables, so every rule is
+    checked while walking the items once:
+      chord_rules:   (code, shift, mod1, mod2) -> [(kind, message)]
+      command_rules: command -> message
+    Required chords and commands are collected during the walk and the
+    missing ones reported afterwards.
+    """
+
+    def __init__(self, rules, digest=""):
+        self.digest = digest
+        self.chord_rules = {}
+        self.required_chords = {}
+        self.required_commands = dict(rules.get("required_commands", {}))
+
+        for shortcut, name in rules.get("required_chords", {}).items():
+            chord = self._chord(shortcut)
+            self.required_chords[chord] = name
+        for shortcut, reason in rules.get("forbidden_chords", {}).items():
+            self.chord_rules.setdefault(self._chord(shortcut), []).append(
+                f"FORBIDDEN: {shortcut} must not be bound ({reason})")
+        # Same list the generator filters on, so the two cannot drift apart.
+        # Bare keys like WIN have no accelerator code and cannot be bound anyway.
+        for shortcut in sorted(BLOCKED_SHORTCUTS):
+            if chord_of(shortcut) is None:
+                continue
+            self.chord_rules.setdefault(self._chord(shortcut), []).append(
+                f"BLOCKED: {shortcut} is reserved by the operating system")
+
+    @staticmethod
+    def _chord(shortcut):
+        chord = chord_of(shortcut)
+        if chord is None:
+            raise ValueError(f"Could not parse key for rule {shortcut}")
+        return chord
+
+_rule_sets = {}
+
+def load_rules(app=None):
+    """RuleSet for rules/<app>.json if an application has its own rules, else rules/default.json."""
+    name = app if app and os.path.exists(os.path.join(RULES_DIR, f"{app}.json")) else "default"
+    if name not in _rule_sets:
+        path = os.path.join(RULES_DIR, f"{name}.json")
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw + "\n".join(sorted(BLOCKED_SHORTCUTS)).encode("utf-8")).hexdigest()
+        _rule_sets[name] = RuleSet(json.loads(raw), digest)
+    return _rule_sets[name]
+
+def verify_cfg(cfg_path, app=None):
+    """
+    app: APPS key selecting the rule file and catalog module; inferred from the file name if omitted.
+    Returns (errors, warnings). Commands missing from the catalog are only
+    warnings while the catalog is a seed rather than a full LibreOffice build.
+    """
     print(f"Verifying {cfg_path}...")
     errors = []
+    warnings = []
+    if app is None:
+        app = app_for(cfg_path)
+    module = APPS[app]["catalog"] if app else None
+    catalog = uno_catalog.load_catalog()
+    rules = load_rules(app)
 
     try:
         with zipfile.ZipFile(cfg_path, 'r') as zf:
             if "Configurations2/accelerator/current.xml" not in zf.namelist():
                 errors.append("Missing Configurations2/accelerator/current.xml")
-                return errors
+                return errors, warnings
 
             xml_content = zf.read("Configurations2/accelerator/current.xml")
 
             try:
                 root = ET.fromstring(xml_content)
 
-                # Check namespace
-                # ElementTree handles namespaces like {http://openoffice.org/2001/accel}item
-                ns = {'accel': 'http://openoffice.org/2001/accel', 'xlink': 'http://www.w3.org/1999/xlink'}
-
-                # Use ElementTree iteration to handle namespaces more robustly
-                items = root.findall('.//{http://openoffice.org/2001/accel}item')
-
+                chord_rules = rules.chord_rules
+                required_chords = rules.required_chords
+                required_commands = rules.required_commands
                 seen_keys = set()
+                found_commands = set()
 
-                for item in items:
-                    code = item.get('{http://openoffice.org/2001/accel}code')
-                    shift = item.get('{http://openoffice.org/2001/accel}shift')
-                    mod1 = item.get('{http://openoffice.org/2001/accel}mod1')
-                    mod2 = item.get('{http://openoffice.org/2001/accel}mod2')
-                    command = item.get('{http://www.w3.org/1999/xlink}href')
+                # Single pass: structure, catalog and rule checks per item
+                for item in root.iter(f"{ACCEL_NS}item"):
+                    code = item.get(f"{ACCEL_NS}code")
+                    shift = item.get(f"{ACCEL_NS}shift") == "true"
+                    mod1 = item.get(f"{ACCEL_NS}mod1") == "true"
+                    mod2 = item.get(f"{ACCEL_NS}mod2") == "true"
+                    command = item.get(f"{XLINK_NS}href")
 
                     if not code:
                         errors.append(f"Item missing code: {ET.tostring(item)}")
@@ -46,83 +130,27 @@ def verify_cfg(cfg_path):
                     # Validate Command Structure
                     if not command.startswith(".uno:"):
                         errors.append(f"Invalid command format (must start with .uno:): {command}")
+                    elif catalog is not None and not catalog.is_valid(command, module):
+                        hint = ", ".join(catalog.suggest(command, module)) or "no close match"
+                        warnings.append(f"Unknown UNO command: {command} (did you mean: {hint})")
 
                     # Check for duplicates
-                    key_sig = f"{code}_{shift}_{mod1}_{mod2}"
-                    if key_sig in seen_keys:
+                    chord = (code, shift, mod1, mod2)
+                    if chord in seen_keys:
                         errors.append(f"Duplicate key assignment: {code} (shift={shift}, mod1={mod1}, mod2={mod2}) assigned to {command}")
-                    seen_keys.add(key_sig)
-
-                # Safety Check: Verify presence of critical keys
-                CRITICAL_KEYS = {
-                    "KEY_BACKSPACE": "Backspace",
-                    "KEY_DELETE": "Delete",
-                    "KEY_RETURN": "Enter",
-                    "KEY_ESCAPE": "Escape",
-                    "KEY_TAB": "Tab",
-                    "KEY_UP": "Up Arrow",
-                    "KEY_DOWN": "Down Arrow",
-                    "KEY_LEFT": "Left Arrow",
-                    "KEY_RIGHT": "Right Arrow",
-                    "KEY_HOME": "Home",
-                    "KEY_END": "End",
-                    "KEY_PAGEUP": "Page Up",
-                    "KEY_PAGEDOWN": "Page Down"
-                }
-
-                # Helper function to check if a key is present (regardless of modifiers for base keys, but checking specific combos for others)
-                def find_key(code, shift=None, mod1=None):
-                    for k in seen_keys:
-                        parts = k.split('_')
-                        # Format: CODE_SHIFT_MOD1_MOD2
-                        # We just need to match the CODE part for basic keys like Arrows/Enter/Backspace
-                        # (Usually these don't require modifiers to simply function, though shift+arrow selects)
-                        # Actually, we want to ensure at least the BASE version exists (no modifiers).
-                        # key_sig = f"{code}_{shift}_{mod1}_{mod2}"
-
-                        k_code = "_".join(parts[:-3]) # Handle codes with underscores? No, codes don't have underscores usually.
-                        # Wait, KEY_PAGE_UP has underscores.
-                        # The splitting logic above is flawed if codes have underscores.
-                        # Better approach: store tuples in seen_keys or parse differently.
-                        # But seen_keys stores strings. Let's re-parse.
-                        pass
-
-                    # Better: Iterate through items again or build a structured set
-                    pass
-
-                # Let's rebuild a structured view of present keys
-                present_codes = set()
-                present_shortcuts = set() # Stores (code, shift, mod1, mod2)
-
-                for item in items:
-                    c = item.get('{http://openoffice.org/2001/accel}code')
-                    s = item.get('{http://openoffice.org/2001/accel}shift') == 'true'
-                    m1 = item.get('{http://openoffice.org/2001/accel}mod1') == 'true'
-                    m2 = item.get('{http://openoffice.org/2001/accel}mod2') == 'true'
-                    if c:
-                        present_codes.add(c)
-                        present_shortcuts.add((c, s, m1, m2))
-
-                for key_code, key_name in CRITICAL_KEYS.items():
-                    # check for base key (no modifiers)
-                    if (key_code, False, False, False) not in present_shortcuts:
-                        errors.append(f"CRITICAL MISSING: {key_name} ({key_code}) is not bound!")
-
-                # Check for critical Ctrl shortcuts (Copy, Cut, Paste, Undo, Redo, Save, Select All)
-                CTRL_SHORTCUTS = {
-                    "KEY_C": "Ctrl+C (Copy)",
-                    "KEY_X": "Ctrl+X (Cut)",
-                    "KEY_V": "Ctrl+V (Paste)",
-                    "KEY_Z": "Ctrl+Z (Undo)",
-                    "KEY_Y": "Ctrl+Y (Redo)",
-                    "KEY_S": "Ctrl+S (Save)",
-                    "KEY_A": "Ctrl+A (Select All)"
-                }
-
-                for key_code, name in CTRL_SHORTCUTS.items():
-                    # Check for Ctrl+Key (mod1=True, others=False)
-                    if (key_code, False, True, False) not in present_shortcuts:
-                         errors.append(f"CRITICAL MISSING: {name} is not bound!")
+                    seen_keys.add(chord)
+
+                    for message in chord_rules.get(chord, ()):
+                        errors.append(f"{message}: {command}")
+                    if command in required_commands:
+                        found_commands.add(command)
+
+                for chord, name in required_chords.items():
+                    if chord not in seen_keys:
+                        errors.append(f"CRITICAL MISSING: {name} is not bound!")
+                for command, name in required_commands.items():
+                    if command not in found_commands:
+                        errors.append(f"CRITICAL MISSING: {name} ({command}) has no shortcut!")
 
             except ET.ParseError as e:
                 errors.append(f"XML Parse Error: {e}")
@@ -132,28 +160,112 @@ def verify_cfg(cfg_path):
     except Exception as e:
         errors.append(f"Unexpected error: {e}")
 
-    return errors
+    return errors, warnings
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"Warning: Ignoring unreadable cache {cache_path}")
+        return {}
+
+def save_cache(cache_path, cache):
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cache_path)
+
+def evict(cache, max_age_days, max_entries, now=None):
+    """Drop entries unused for max_age_days, then the least recently used beyond max_entries."""
+    now = now or time.time()
+    cutoff = now - max_age_days * 86400
+    for key in [k for k, v in cache.items() if v["last_used"] < cutoff]:
+        del cache[key]
+    if len(cache) > max_entries:
+        by_use = sorted(cache, key=lambda k: cache[k]["last_used"])
+        for key in by_use[:len(cache) - max_entries]:
+            del cache[key]
+
+def verify_cached(cfg_path, cache, force=False):
+    """
+    verify_cfg with results keyed by the archive's SHA-256, the application it
+    is checked as, RULESET_VERSION, the catalog version and the rules.
+    Returns (errors, warnings, from_cache).
+    """
+    app = app_for(cfg_path)
+    catalog = uno_catalog.load_catalog()
+    catalog_version = catalog.version if catalog else "none"
+    rules = load_rules(app)
+    try:
+        sha256 = file_sha256(cfg_path)
+    except OSError as e:
+        # Reported like any other unreadable archive, and never cached
+        print(f"Verifying {cfg_path}...")
+        return [f"Unexpected error: {e}"], [], False
+    key = f"{sha256}:{app}:{RULESET_VERSION}:{catalog_version}:{rules.digest}"
+    entry = cache.get(key)
+    if entry is not None and not force:
+        entry["last_used"] = time.time()
+        return entry["errors"], entry["warnings"], True
+
+    errors, warnings = verify_cfg(cfg_path, app)
+    # Environment failures (I/O and the like) may not repeat, so they are not cached
+    if not any(e.startswith("Unexpected error") for e in errors):
+        now = time.time()
+        cache[key] = {"errors": errors, "warnings": warnings, "checked": now, "last_used": now}
+    return errors, warnings, False
 
 if __name__ == "__main__":
-    if not os.path.exists("dist"):
-        print("dist/ directory not found.")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Verify generated LibreOffice shortcut configs")
+    parser.add_argument("paths", nargs="*", help="Archives to verify (default: dist/*.cfg)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help=f"Result cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    parser.add_argument("--force", action="store_true", help="Re-verify every archive and refresh its cached result")
+    parser.add_argument("--max-age", type=float, default=30, help="Evict cache entries unused for this many days")
+    parser.add_argument("--max-entries", type=int, default=10000, help="Maximum number of cached results")
+    args = parser.parse_args()
 
-    cfg_files = glob.glob("dist/*.cfg")
-    if not cfg_files:
-        print("No .cfg files found in dist/")
-        sys.exit(1)
+    if args.paths:
+        cfg_files = args.paths
+    else:
+        if not os.path.exists("dist"):
+            print("dist/ directory not found.")
+            sys.exit(1)
+
+        cfg_files = glob.glob("dist/*.cfg")
+        if not cfg_files:
+            print("No .cfg files found in dist/")
+            sys.exit(1)
+
+    cache = {} if args.no_cache else load_cache(args.cache)
 
     all_passed = True
     for cfg in cfg_files:
-        errors = verify_cfg(cfg)
+        errors, warnings, from_cache = verify_cached(cfg, cache, args.force)
+        suffix = " (cached)" if from_cache else ""
+        for warning in warnings:
+            print(f"Warning: {warning}")
         if errors:
             all_passed = False
-            print(f"FAILED: {cfg}")
+            print(f"FAILED: {cfg}{suffix}")
             for err in errors:
                 print(f"  - {err}")
         else:
-            print(f"PASSED: {cfg}")
+            print(f"PASSED: {cfg}{suffix}")
+
+    if not args.no_cache:
+        evict(cache, args.max_age, args.max_entries)
+        save_cache(args.cache, cache)
 
     if not all_passed:
         sys.exit(1)
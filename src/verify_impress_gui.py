@@ -1,27 +1,39 @@
-from test_utils import launch_app, save_and_close
-import pyautogui
-import time
+from test_utils import launch_app, save_and_close, connect_document, expect_step, press, hotkey, write, sleep
 import os
 import sys
 from odf import draw, teletype
 from odf.opendocument import load
 
+# Read by select_gui_tests.py to decide when this test needs to run again
+GUI_TEST = {
+    "apps": ["impress"],
+    "shortcuts": [
+        "Ctrl+M", "Ctrl+Shift+D", "F2", "Esc", "Enter",
+        "Ctrl+S", "Ctrl+Q"
+    ],
+}
+
 def verify_impress_gui():
     print("Starting Impress GUI Verification...")
     proc = launch_app("impress")
+    probe = connect_document()
 
     # 1. New Slide (Ctrl+M)
     print("Test: New Slide (Ctrl+M)")
     # Usually starts with 1 slide.
-    pyautogui.hotkey('ctrl', 'm')
-    time.sleep(1)
+    hotkey('ctrl', 'm')
+    sleep(1)
     # Should be on Slide 2.
+    if probe:
+        expect_step(proc, "New Slide", lambda: probe.slide_count(), 2)
 
     # 2. Duplicate Slide (Ctrl+Shift+D)
     print("Test: Duplicate Slide (Ctrl+Shift+D)")
-    pyautogui.hotkey('ctrl', 'shift', 'd')
-    time.sleep(1)
+    hotkey('ctrl', 'shift', 'd')
+    sleep(1)
     # Should be on Slide 3 (copy of Slide 2).
+    if probe:
+        expect_step(proc, "Duplicate Slide", lambda: probe.slide_count(), 3)
 
     # 3. Add Text
     print("Test: Type Text on Slide 3")
@@ -29,10 +41,15 @@ def verify_impress_gui():
     # Impress selection model is tricky.
     # Often need to click "Click to add title".
     # Let's try F2 (Edit Text)
-    pyautogui.press('f2')
-    time.sleep(0.5)
-    pyautogui.write("Slide3Text", interval=0.1)
-    pyautogui.press('esc')
+    press('f2')
+    sleep(0.5)
+    write("Slide3Text", interval=0.1)
+    press('esc')
+    if probe:
+        expect_step(proc, "Text on Slide 3", lambda: "Slide3Text" in probe.slide_text(probe.slide_count() - 1), True)
+        probe.close(proc)
+        print("SUCCESS: Impress Verification Passed.")
+        return
 
     output_file = os.path.abspath("test_impress.odp")
     save_and_close(output_file, proc)
@@ -0,0 +1,266 @@
+import os
+import sys
+import json
+import argparse
+
+from generate_config import APPS, BLOCKED_SHORTCUTS, merge_mappings, chord_of
+
+# Probe format
+# ------------
+# A probe is a JSON object describing one shortcut check:
+#   {
+#     "app": "writer",
+#     "command_name": "Bold",
+#     "uno_command": ".uno:Bold",
+#     "shortcut": "Ctrl+B",
+#     "keys": ["ctrl", "b"],            # pyautogui key names for the chord
+#     "kind": "content" | "smoke" | "skip",
+#     "setup": [["write", "text"], ["press", "enter"], ...],
+#     "steps": [...],                   # "chord" as a step presses "keys"
+#     "teardown": [...],
+#     "expect_text": "ProbeBold",       # content probes: text present after save
+#     "reason": "..."                   # skip probes: why it is not run
+#   }
+# Smoke probes press the chord, dismiss any dialog and check LibreOffice is
+# still running. Content probes also leave a marker in the document that is
+# checked once, after a single save at the end of their own session.
+
+# Read by select_gui_tests.py: probes cover every chord of every application
+GUI_TEST = {
+    "apps": ["writer", "calc", "impress"],
+    "shortcuts": "*",
+}
+
+CODE_TO_KEY = {
+    "KEY_SPACE": "space",
+    "KEY_RETURN": "enter",
+    "KEY_ESCAPE": "esc",
+    "KEY_BACKSPACE": "backspace",
+    "KEY_DELETE": "delete",
+    "KEY_UP": "up",
+    "KEY_DOWN": "down",
+    "KEY_LEFT": "left",
+    "KEY_RIGHT": "right",
+    "KEY_HOME": "home",
+    "KEY_END": "end",
+    "KEY_PAGEUP": "pageup",
+    "KEY_PAGEDOWN": "pagedown",
+    "KEY_TAB": "tab",
+    "KEY_INSERT": "insert",
+    "KEY_ADD": "add",
+    "KEY_SUBTRACT": "subtract",
+    "KEY_EQUAL": "=",
+    "KEY_POINT": ".",
+    "KEY_COMMA": ",",
+    "KEY_SEMICOLON": ";",
+    "KEY_BRACKETLEFT": "[",
+    "KEY_BRACKETRIGHT": "]",
+    "KEY_QUOTELEFT": "`",
+    "KEY_LESS": "<",
+    "KEY_GREATER": ">",
+}
+
+# Commands that close, replace or leave the test document, or open a
+# modal flow we cannot dismiss with Escape.
+UNSAFE_COMMANDS = {
+    ".uno:Quit": "closes LibreOffice",
+    ".uno:CloseDoc": "closes the test document",
+    ".uno:CloseWin": "closes the test document",
+    ".uno:NewDoc": "opens a second document window",
+    ".uno:Open": "opens a file dialog outside the test document",
+    ".uno:Save": "saving is exercised by save_and_close",
+    ".uno:SaveAs": "saving is exercised by save_and_close",
+    ".uno:Print": "may send the document to a printer",
+    ".uno:PrintDefault": "may send the document to a printer",
+}
+
+# Content templates: steps around the chord and the marker they leave behind.
+CONTENT_TEMPLATES = {
+    ("writer", ".uno:Bold"): {
+        "steps": ["chord", ["write", "ProbeBold"], "chord", ["press", "enter"]],
+        "expect_text": "ProbeBold",
+    },
+    ("writer", ".uno:Italic"): {
+        "steps": ["chord", ["write", "ProbeItalic"], "chord", ["press", "enter"]],
+        "expect_text": "ProbeItalic",
+    },
+    ("writer", ".uno:Underline"): {
+        "steps": ["chord", ["write", "ProbeUnderline"], "chord", ["press", "enter"]],
+        "expect_text": "ProbeUnderline",
+    },
+    ("writer", ".uno:Undo"): {
+        "steps": [["write", "ProbeUndo "], ["write", "Mistake"], "chord", ["press", "enter"]],
+        "expect_text": "ProbeUndo",
+    },
+}
+
+def chord_keys(chord):
+    code, shift, mod1, mod2 = chord
+    keys = []
+    if mod1:
+        keys.append("ctrl")
+    if mod2:
+        keys.append("alt")
+    if shift:
+        keys.append("shift")
+    if code in CODE_TO_KEY:
+        keys.append(CODE_TO_KEY[code])
+    elif code.startswith("KEY_"):
+        keys.append(code[len("KEY_"):].lower())
+    else:
+        return None
+    return keys
+
+def generate_probes(app_key):
+    """Derive one probe per mapping of the application's merged mapping set."""
+    app = APPS[app_key]
+    probes = []
+    for mapping in merge_mappings(app["mappings"], app["defaults"]):
+        probe = {
+            "app": app_key,
+            "command_name": mapping["command_name"],
+            "uno_command": mapping["uno_command"],
+            "shortcut": mapping["ms_shortcut"],
+            "setup": [],
+            "steps": ["chord"],
+            "teardown": [["press", "esc"], ["press", "esc"]],
+        }
+        chord = chord_of(mapping["ms_shortcut"])
+        keys = chord_keys(chord) if chord else None
+        probe["keys"] = keys
+
+        template = CONTENT_TEMPLATES.get((app_key, mapping["uno_command"]))
+        # Same filtering as compile_mappings: these shortcuts are not in the .cfg
+        if mapping["ms_shortcut"].upper().replace(" ", "") in BLOCKED_SHORTCUTS:
+            probe["kind"] = "skip"
+            probe["reason"] = "blocked system shortcut, not written to the .cfg"
+        elif chord is None:
+            probe["kind"] = "skip"
+            probe["reason"] = "shortcut cannot be parsed, not written to the .cfg"
+        elif keys is None:
+            probe["kind"] = "skip"
+            probe["reason"] = "shortcut cannot be typed with pyautogui"
+        elif mapping["uno_command"] in UNSAFE_COMMANDS:
+            probe["kind"] = "skip"
+            probe["reason"] = UNSAFE_COMMANDS[mapping["uno_command"]]
+        elif template:
+            probe["kind"] = "content"
+            probe["steps"] = template["steps"]
+            probe["expect_text"] = template["expect_text"]
+        else:
+            probe["kind"] = "smoke"
+        probes.append(probe)
+    return probes
+
+def run_steps(steps, keys, interval):
+    from test_utils import press, hotkey, write, sleep
+
+    for step in steps:
+        if step == "chord":
+            hotkey(*keys)
+        elif step[0] == "write":
+            write(step[1], interval=0.05)
+        elif step[0] == "press":
+            press(step[1])
+        elif step[0] == "hotkey":
+            hotkey(*step[1:])
+        elif step[0] == "sleep":
+            sleep(step[1], "probe step")
+        else:
+            raise ValueError(f"Unknown probe step: {step}")
+        sleep(interval, "probe interval")
+
+def collect_text(output_file):
+    from odf import text, teletype
+    from odf.opendocument import load
+
+    doc = load(output_file)
+    content = []
+    for element_type in (text.P, text.H):
+        for element in doc.getElementsByType(element_type):
+            t = teletype.extractText(element).strip()
+            if t:
+                content.append(t)
+    return content
+
+def run_session(app_key, probes, output_file, interval):
+    """Run probes in one fresh LibreOffice session and save the document; returns failures."""
+    from test_utils import launch_app, save_and_close, finish_monitor
+
+    proc = launch_app(app_key)
+    for probe in probes:
+        print(f"Probe: {probe['shortcut']} -> {probe['uno_command']} ({probe['kind']})")
+        run_steps(probe["setup"], probe["keys"], interval)
+        run_steps(probe["steps"], probe["keys"], interval)
+        run_steps(probe["teardown"], probe["keys"], interval)
+        if proc.poll() is not None:
+            finish_monitor(proc)
+            return [f"{probe['shortcut']} ({probe['uno_command']}): LibreOffice exited"]
+
+    save_and_close(output_file, proc)
+    return []
+
+def run_probes(app_key, probes, interval=0.3):
+    """
+    Run the probes of one application and return a list of failures.
+    Content probes get their own session, so smoke probes that delete, paste or
+    move text cannot disturb the markers; smoke probes then share a second one.
+    """
+    content = [p for p in probes if p["kind"] == "content"]
+    smoke = [p for p in probes if p["kind"] == "smoke"]
+    print(f"Running {len(content) + len(smoke)} of {len(probes)} probes in {APPS[app_key]['name']} "
+          f"({len(content)} content, {len(smoke)} smoke)...")
+
+    ext = APPS[app_key]['odf_ext']
+    failures = []
+    if content:
+        output_file = os.path.abspath(f"test_probes_{app_key}.{ext}")
+        failures.extend(run_session(app_key, content, output_file, interval))
+        if not failures:
+            text = collect_text(output_file)
+            for probe in content:
+                if probe["expect_text"] not in text:
+                    failures.append(f"{probe['shortcut']} ({probe['uno_command']}): '{probe['expect_text']}' not found")
+    if smoke:
+        output_file = os.path.abspath(f"test_probes_{app_key}_smoke.{ext}")
+        failures.extend(run_session(app_key, smoke, output_file, interval))
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate and run one GUI probe per shortcut mapping")
+    parser.add_argument("--app", choices=list(APPS), action="append", help="Application(s) to probe (default: all)")
+    parser.add_argument("--dump", metavar="PATH", help="Write the generated probes as JSON and exit")
+    parser.add_argument("--probes", metavar="PATH", help="Run probes from a JSON file instead of generating them")
+    parser.add_argument("--interval", type=float, default=0.3, help="Seconds to wait after each key action")
+    args = parser.parse_args()
+
+    if args.probes:
+        with open(args.probes, 'r') as f:
+            all_probes = json.load(f)
+    else:
+        all_probes = []
+        for app_key in (args.app or APPS):
+            all_probes.extend(generate_probes(app_key))
+
+    if args.dump:
+        with open(args.dump, 'w') as f:
+            json.dump(all_probes, f, indent=4)
+        print(f"Wrote {len(all_probes)} probes to {args.dump}")
+        sys.exit(0)
+
+    for probe in all_probes:
+        if probe["kind"] == "skip":
+            print(f"SKIP: {probe['shortcut']} -> {probe['uno_command']}: {probe['reason']}")
+
+    all_failures = []
+    apps = [a for a in APPS if any(p["app"] == a for p in all_probes)]
+    for app_key in apps:
+        all_failures.extend(run_probes(app_key, [p for p in all_probes if p["app"] == app_key], args.interval))
+
+    if all_failures:
+        print("FAILURE: Probe verification failed!")
+        for failure in all_failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+
+    print("SUCCESS: All probes passed.")
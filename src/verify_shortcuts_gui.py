@@ -1,24 +1,17 @@
 import os
 import sys
-import time
-import subprocess
-import shutil
+from test_utils import launch_app, save_and_close, press, hotkey, write, sleep
 
-# Check for required libraries inside function to allow import after install prompt
-def check_deps():
-    try:
-        import pyautogui
-        from odf import text, teletype
-        from odf.opendocument import load
-        return True
-    except ImportError:
-        print("Error: Missing required libraries.")
-        print("Please install them using: pip install pyautogui odfpy")
-        sys.exit(1)
+# Read by select_gui_tests.py to decide when this test needs to run again
+GUI_TEST = {
+    "apps": ["writer"],
+    "shortcuts": [
+        "Backspace", "Enter", "Home", "Delete", "End", "Ctrl+Shift+Left",
+        "Ctrl+S", "Ctrl+Q"
+    ],
+}
 
 def verify_shortcuts_gui():
-    check_deps()
-    import pyautogui
     from odf import text, teletype
     from odf.opendocument import load
 
@@ -27,65 +20,50 @@ def verify_shortcuts_gui():
     print("Please do not touch anything until it finishes.")
 
     # 1. Launch LibreOffice Writer
-    print("\nLaunching LibreOffice Writer...")
-    executable = shutil.which("libreoffice") or shutil.which("soffice")
-    if not executable:
-        print("Error: LibreOffice executable not found in PATH.")
-        sys.exit(1)
-
-    proc = subprocess.Popen([executable, "--writer", "--nologo", "--nodefault"])
-
-    # Wait for load
-    print("Waiting 10 seconds for LibreOffice to load...")
-    time.sleep(10)
-
-    # Focus
-    screen_width, screen_height = pyautogui.size()
-    pyautogui.click(screen_width // 2, screen_height // 2)
-    time.sleep(1)
+    proc = launch_app('writer')
 
     # --- Test Case 1: Backspace ---
     # Goal: Type "StartTest", Backspace 4 times, Type "Passed".
     # Result: "StartPassed"
     print("Running Test 1: Backspace...")
-    pyautogui.write("StartTest", interval=0.1)
-    time.sleep(0.5)
+    write("StartTest", interval=0.1)
+    sleep(0.5)
     for _ in range(4):
-        pyautogui.press('backspace')
-        time.sleep(0.1)
-    pyautogui.write("Passed", interval=0.1)
-    time.sleep(0.5)
-    pyautogui.press('enter')
-    time.sleep(0.5)
+        press('backspace')
+        sleep(0.1)
+    write("Passed", interval=0.1)
+    sleep(0.5)
+    press('enter')
+    sleep(0.5)
 
     # --- Test Case 2: Enter ---
     # Goal: Type "Line1", Enter, "Line2".
     # Result: Two paragraphs: "Line1", "Line2"
     print("Running Test 2: Enter...")
-    pyautogui.write("Line1", interval=0.1)
-    time.sleep(0.5)
-    pyautogui.press('enter')
-    time.sleep(0.5)
-    pyautogui.write("Line2", interval=0.1)
-    time.sleep(0.5)
-    pyautogui.press('enter')
-    time.sleep(0.5)
+    write("Line1", interval=0.1)
+    sleep(0.5)
+    press('enter')
+    sleep(0.5)
+    write("Line2", interval=0.1)
+    sleep(0.5)
+    press('enter')
+    sleep(0.5)
 
     # --- Test Case 3: Delete ---
     # Goal: Type "DeleteThis", Home, Delete 6 times.
     # Result: "This"
     print("Running Test 3: Delete...")
-    pyautogui.write("DeleteThis", interval=0.1)
-    time.sleep(0.5)
-    pyautogui.press('home')
-    time.sleep(0.5)
+    write("DeleteThis", interval=0.1)
+    sleep(0.5)
+    press('home')
+    sleep(0.5)
     for _ in range(6):
-        pyautogui.press('delete')
-        time.sleep(0.1)
-    pyautogui.press('end') # Move to end to avoid messing up next line
-    time.sleep(0.5)
-    pyautogui.press('enter')
-    time.sleep(0.5)
+        press('delete')
+        sleep(0.1)
+    press('end') # Move to end to avoid messing up next line
+    sleep(0.5)
+    press('enter')
+    sleep(0.5)
 
     # --- Test Case 4: Select All (Ctrl+A) and Replace ---
     # Goal: Type "SelectAll", Ctrl+A, "Replaced".
@@ -101,45 +79,22 @@ def verify_shortcuts_gui():
     # Type "SelectWord", Ctrl+Shift+Left, "Replaced".
     # Result: "Replaced"
     print("Running Test 4: Selection (Ctrl+Shift+Left)...")
-    pyautogui.write("SelectWord", interval=0.1)
-    time.sleep(0.5)
+    write("SelectWord", interval=0.1)
+    sleep(0.5)
     # Use standard select word shortcut
-    pyautogui.hotkey('ctrl', 'shift', 'left')
-    time.sleep(0.5)
+    hotkey('ctrl', 'shift', 'left')
+    sleep(0.5)
     # Type overwrite
-    pyautogui.write("Replaced", interval=0.1)
-    time.sleep(0.5)
-    pyautogui.press('enter')
+    write("Replaced", interval=0.1)
+    sleep(0.5)
+    press('enter')
 
-    # Save
-    print("Saving test results...")
+    # Save and close
     output_file = os.path.abspath("test_result.odt")
-    if os.path.exists(output_file):
-        os.remove(output_file)
-
-    pyautogui.hotkey('ctrl', 's')
-    time.sleep(2)
-    pyautogui.write(output_file, interval=0.1)
-    time.sleep(1)
-    pyautogui.press('enter')
-    time.sleep(3)
-    # Confirm overwrite if needed (might not appear if file was deleted, but safe to press)
-    pyautogui.press('enter')
-    time.sleep(1)
-
-    # Close
-    print("Closing LibreOffice...")
-    pyautogui.hotkey('ctrl', 'q')
-    time.sleep(2)
-    if proc.poll() is None:
-        proc.terminate()
+    save_and_close(output_file, proc)
 
     # Verify
     print("\nVerifying Document Content...")
-    if not os.path.exists(output_file):
-        print(f"FAILED: Output file {output_file} was not created.")
-        sys.exit(1)
-
     try:
         doc = load(output_file)
         paragraphs = []
@@ -1,60 +1,81 @@
-from test_utils import launch_app, save_and_close
-import pyautogui
-import time
+from test_utils import launch_app, save_and_close, connect_document, expect_step, press, hotkey, write, sleep
 import os
 import sys
 from odf import text, teletype
 from odf.opendocument import load
 
+# Read by select_gui_tests.py to decide when this test needs to run again
+GUI_TEST = {
+    "apps": ["writer"],
+    "shortcuts": [
+        "Backspace", "Enter", "Ctrl+Alt+1", "Ctrl+Z", "Ctrl+Shift+Left", "Delete", "Ctrl+B",
+        "Ctrl+S", "Ctrl+Q"
+    ],
+}
+
 def verify_writer_gui():
     print("Starting Writer GUI Verification...")
     proc = launch_app("writer")
+    probe = connect_document()
 
     # 1. Backspace
     print("Test: Backspace")
-    pyautogui.write("BackTest", interval=0.1)
-    time.sleep(0.5)
+    write("BackTest", interval=0.1)
+    sleep(0.5)
     for _ in range(4):
-        pyautogui.press('backspace')
-        time.sleep(0.1)
-    pyautogui.write("Pass", interval=0.1)
-    pyautogui.press('enter')
+        press('backspace')
+        sleep(0.1)
+    write("Pass", interval=0.1)
+    press('enter')
     # Expect: "BackPass"
+    if probe:
+        expect_step(proc, "Backspace", lambda: probe.paragraph(0), "BackPass")
 
-    # 2. Styles (Ctrl+1 Heading 1)
-    print("Test: Styles (Ctrl+1)")
-    pyautogui.write("HeadingText", interval=0.1)
-    pyautogui.hotkey('ctrl', '1') # Heading 1
-    pyautogui.press('enter')
+    # 2. Styles (Ctrl+Alt+1 Heading 1, as in Word)
+    print("Test: Styles (Ctrl+Alt+1)")
+    write("HeadingText", interval=0.1)
+    hotkey('ctrl', 'alt', '1') # Heading 1
+    press('enter')
+    if probe:
+        expect_step(proc, "Heading 1 style", lambda: probe.paragraph_style(1), "Heading 1")
 
     # 3. Undo/Redo
     print("Test: Undo/Redo (Ctrl+Z/Y)")
-    pyautogui.write("Mistake", interval=0.1)
-    time.sleep(0.5)
-    pyautogui.hotkey('ctrl', 'z') # Undo "Mistake"
-    time.sleep(0.5)
-    pyautogui.write("Correct", interval=0.1) # Write "Correct"
-    pyautogui.press('enter')
+    write("Mistake", interval=0.1)
+    sleep(0.5)
+    hotkey('ctrl', 'z') # Undo "Mistake"
+    sleep(0.5)
+    write("Correct", interval=0.1) # Write "Correct"
+    press('enter')
     # Expect: "Correct" (after previous line)
+    if probe:
+        expect_step(proc, "Undo", lambda: probe.paragraph(2), "Correct")
 
     # 4. Selection & Delete
     print("Test: Selection (Ctrl+Shift+Left) & Delete")
-    pyautogui.write("DelWord", interval=0.1)
-    time.sleep(0.5)
-    pyautogui.hotkey('ctrl', 'shift', 'left')
-    time.sleep(0.5)
-    pyautogui.press('delete')
-    time.sleep(0.5)
-    pyautogui.write("Gone", interval=0.1)
-    pyautogui.press('enter')
+    write("DelWord", interval=0.1)
+    sleep(0.5)
+    hotkey('ctrl', 'shift', 'left')
+    sleep(0.5)
+    press('delete')
+    sleep(0.5)
+    write("Gone", interval=0.1)
+    press('enter')
     # Expect: "Gone"
+    if probe:
+        expect_step(proc, "Selection/Delete", lambda: probe.paragraph(3), "Gone")
 
     # 5. Bold (Ctrl+B)
     print("Test: Bold (Ctrl+B)")
-    pyautogui.hotkey('ctrl', 'b')
-    pyautogui.write("BoldText", interval=0.1)
-    pyautogui.hotkey('ctrl', 'b') # Toggle off
-    pyautogui.press('enter')
+    hotkey('ctrl', 'b')
+    write("BoldText", interval=0.1)
+    hotkey('ctrl', 'b') # Toggle off
+    press('enter')
+    if probe:
+        expect_step(proc, "Bold", lambda: probe.paragraph(4), "BoldText")
+        probe.close(proc)
+        print("SUCCESS: Writer Verification Passed.")
+        return
 
     output_file = os.path.abspath("test_writer.odt")
     save_and_close(output_file, proc)
@@ -113,5 +134,13 @@ def verify_writer_gui():
         if exp not in all_text_content:
             errors.append(f"Missing expected content: '{exp}' ({desc})")
 
+    if errors:
+        print("FAILURE: Writer Verification Failed!")
+        for e in errors:
+            print(f"  - {e}")
+        sys.exit(1)
+
+    print("SUCCESS: Writer Verification Passed.")
+
 if __name__ == "__main__":
     verify_writer_gui()